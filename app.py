@@ -1,3 +1,4 @@
+import multiprocessing
 import tkinter as tk
 from view.splash_screen import SplashScreen
 from view.main_view import start_app
@@ -13,4 +14,6 @@ def launch_app():
     splash.show()
 
 if __name__ == "__main__":
+    # Necessário para o modo de transcrição paralela em executáveis (PyInstaller)
+    multiprocessing.freeze_support()
     launch_app()
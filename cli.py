@@ -0,0 +1,49 @@
+"""
+Transcrição em lote pela linha de comando (sem interface gráfica)
+
+Uso:
+    python -m cli pasta/ outra/aula*.mp4 [--recursive] [--summary resumo.json]
+"""
+
+import sys
+import json
+import argparse
+import multiprocessing
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cli",
+        description="Transcreve vídeos em lote usando um único modelo carregado"
+    )
+    parser.add_argument("inputs", nargs="+", help="arquivos, diretórios ou padrões glob")
+    parser.add_argument("-r", "--recursive", action="store_true", help="procura vídeos em subdiretórios")
+    parser.add_argument("--summary", help="grava o resumo do lote em JSON neste arquivo")
+    args = parser.parse_args(argv)
+
+    from controller.batch_controller import collect_videos, process_batch
+
+    videos = collect_videos(args.inputs, recursive=args.recursive)
+    if not videos:
+        print("Nenhum vídeo encontrado")
+        return 2
+
+    summary = process_batch(videos)
+
+    print("=== RESUMO DO LOTE ===")
+    print(f"Arquivos: {summary['files']} ({summary['succeeded']} ok, {summary['failed']} com erro)")
+    print(f"Áudio processado: {summary['audio_hours']:.2f} h em {summary['wall_hours']:.2f} h")
+    print(f"Vazão: {summary['throughput']:.1f} horas de áudio por hora")
+    for status in summary["results"]:
+        if status["status"] == "error":
+            print(f"✗ {status['video']}: {status['error']}")
+
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    # Necessário para o modo de transcrição paralela em executáveis (PyInstaller)
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Processamento em lote (sem interface gráfica)
+
+Os vídeos são processados um a um com process_video (ou pelo daemon, se
+estiver rodando), reutilizando o mesmo modelo carregado. Enquanto um vídeo é transcrito, o próximo é analisado
+(ffprobe) e tem sua leitura adiantada para o cache de páginas do sistema.
+"""
+
+import os
+import glob
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from controller.transcribe_controller import process_video, output_dir_for
+from service.daemon_client_service import daemon_available, process_video_remote
+from service.whisper_service import (
+    configure_ffmpeg, get_video_duration, preload_model, set_notification_sound, log
+)
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".wmv", ".flv", ".webm")
+
+STATUS_FILE = "status.json"
+
+def collect_videos(inputs, recursive=False):
+    """Expande arquivos, diretórios e padrões glob em uma lista ordenada de vídeos"""
+    videos = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, "**", "*") if recursive else os.path.join(item, "*")
+            candidates = glob.glob(pattern, recursive=recursive)
+        elif glob.has_magic(item):
+            candidates = glob.glob(item, recursive=recursive)
+        else:
+            candidates = [item]
+
+        for path in sorted(candidates):
+            if os.path.isfile(path) and path.lower().endswith(VIDEO_EXTENSIONS):
+                videos.append(path)
+            elif not os.path.exists(path):
+                log(f"⚠ Entrada não encontrada: {path}")
+
+    # Remove duplicados mantendo a ordem
+    unique = {}
+    for video in videos:
+        unique.setdefault(os.path.abspath(video), video)
+    return list(unique.values())
+
+def prefetch_video(video_path):
+    """Analisa a duração e adianta a leitura do arquivo (roda em segundo plano)"""
+    if hasattr(os, "posix_fadvise"):
+        try:
+            fd = os.open(video_path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+    return get_video_duration(video_path)
+
+def write_status(status):
+    output_dir = status["output_dir"]
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, STATUS_FILE), "w", encoding="utf-8") as f:
+        json.dump(status, f, ensure_ascii=False, indent=2)
+
+def process_batch(video_paths):
+    """Processa os vídeos em sequência e retorna o resumo do lote"""
+    set_notification_sound(False)
+    if not configure_ffmpeg():
+        raise Exception("Falha na configuração do FFmpeg")
+
+    # Com o daemon rodando, o modelo já está carregado nele
+    run_job = process_video
+    if daemon_available():
+        log("✓ Daemon de transcrição encontrado; jobs serão enviados a ele")
+        run_job = process_video_remote
+    else:
+        preload_model()
+
+    results = []
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch") as executor:
+        next_probe = executor.submit(prefetch_video, video_paths[0]) if video_paths else None
+
+        for index, video_path in enumerate(video_paths):
+            probe = next_probe
+            next_probe = None
+            if index + 1 < len(video_paths):
+                next_probe = executor.submit(prefetch_video, video_paths[index + 1])
+
+            log(f"=== [{index + 1}/{len(video_paths)}] {video_path} ===")
+            try:
+                duration = probe.result()
+            except Exception:
+                duration = None
+
+            status = {
+                "video": video_path,
+                "output_dir": output_dir_for(video_path),
+                "status": "running",
+                "duration": duration,
+            }
+            file_started = time.perf_counter()
+            try:
+                transcription, blog_txt, hotmart_txt, youtube_txt, output_dir, frames_dir = run_job(video_path)
+                if not status["duration"] and transcription:
+                    status["duration"] = transcription[-1]["end"]
+                status.update({
+                    "status": "ok",
+                    "output_dir": output_dir,
+                    "segments": len(transcription),
+                    "outputs": [blog_txt, hotmart_txt, youtube_txt],
+                    "frames_dir": frames_dir,
+                })
+            except Exception as e:
+                log(f"✗ Falha ao processar {video_path}: {e}")
+                status.update({"status": "error", "error": str(e)})
+
+            status["wall_seconds"] = time.perf_counter() - file_started
+            try:
+                write_status(status)
+            except Exception as e:
+                log(f"⚠ Não foi possível gravar {STATUS_FILE}: {e}")
+            results.append(status)
+
+    wall = time.perf_counter() - started
+    audio = sum(s["duration"] or 0 for s in results if s["status"] == "ok")
+    return {
+        "files": len(results),
+        "succeeded": sum(1 for s in results if s["status"] == "ok"),
+        "failed": sum(1 for s in results if s["status"] == "error"),
+        "audio_hours": audio / 3600,
+        "wall_hours": wall / 3600,
+        # Horas de áudio processadas por hora de relógio
+        "throughput": audio / wall if wall > 0 else 0.0,
+        "results": results,
+    }
@@ -1,17 +1,49 @@
-from service.whisper_service import transcribe_audio_with_timestamps, save_transcription_to_txt, set_log_callback, log, play_notification_sound
+from service.whisper_service import transcribe_audio_with_timestamps, save_transcription_to_txt, set_log_callback, log, play_notification_sound, get_transcription_options
+from service.config_service import get_setting
+from service.result_cache_service import make_cache_key, get_cached_transcription, store_transcription
+from service.frame_stage_service import FrameCaptureStage
+from service.trace_service import span, start_trace, stop_trace
 import os
 import traceback
 
+def output_dir_for(video_path):
+    return os.path.join("output", os.path.splitext(os.path.basename(video_path))[0])
+
 def process_video(video_path, progress_callback=None, log_callback=None):
     # Configura callback de log
     if log_callback:
         set_log_callback(log_callback)
-    
+
+    if not get_setting("logging", "trace"):
+        return _process_video(video_path, progress_callback)
+
+    # Trace do job em output/<vídeo>/trace.json (abrir em ui.perfetto.dev)
+    tracer = start_trace(os.path.basename(video_path))
+    try:
+        with span("process_video", path=video_path):
+            return _process_video(video_path, progress_callback)
+    finally:
+        stop_trace()
+        save_job_trace(tracer, output_dir_for(video_path))
+
+def save_job_trace(tracer, output_dir):
+    """Grava o trace do job e registra no log as etapas mais demoradas"""
+    try:
+        path = tracer.save(os.path.join(output_dir, "trace.json"))
+    except Exception as e:
+        log(f"⚠ Não foi possível gravar o trace: {e}")
+        return None
+    log(f"⏱ Trace do job: {path}")
+    for name, count, wall_ms, cpu_ms in tracer.summary()[:8]:
+        log(f"⏱ {name}: {count}x, {wall_ms:.0f} ms ({cpu_ms:.0f} ms de CPU)")
+    return path
+
+def _process_video(video_path, progress_callback=None):
     log("=== INICIANDO PROCESSAMENTO DO VÍDEO ===")
     log(f"Arquivo: {video_path}")
     
     # Cria diretório de saída
-    output_dir = os.path.join("output", os.path.splitext(os.path.basename(video_path))[0])
+    output_dir = output_dir_for(video_path)
     log(f"Diretório de saída: {output_dir}")
     
     try:
@@ -21,16 +53,48 @@ def process_video(video_path, progress_callback=None, log_callback=None):
         log(f"✗ Erro ao criar diretório: {e}")
         raise
 
-    # Transcreve o áudio
-    log("Iniciando transcrição de áudio...")
-    transcription = transcribe_audio_with_timestamps(video_path, progress_callback)
+    # Captura de quadros em processo separado, em paralelo com a transcrição
+    frame_stage = None
+    capture_mode = get_setting("frames", "capture", "off")
+    if capture_mode in ("segments", "interval", "scenes"):
+        scene_options = {
+            "top_k": get_setting("frames", "scene_top_k", 12),
+            "sample_fps": get_setting("frames", "scene_sample_fps", 1.0),
+            "min_gap": get_setting("frames", "scene_min_gap", 5.0),
+            "time_budget": get_setting("frames", "scene_time_budget", 0.0),
+        }
+        try:
+            with span("frames_start", mode=capture_mode):
+                frame_stage = FrameCaptureStage(
+                    video_path, output_dir, capture_mode, get_setting("frames", "capture_interval", 30.0),
+                    scene_options=scene_options
+                )
+            log(f"✓ Captura de quadros iniciada (modo {capture_mode})")
+        except Exception as e:
+            log(f"⚠ Não foi possível iniciar a captura de quadros: {e}")
+    chunk_callback = frame_stage.add_chunk if frame_stage else None
+
+    try:
+        transcription = transcribe_with_cache(video_path, progress_callback, chunk_callback)
+    except Exception:
+        if frame_stage:
+            frame_stage.abort()
+        raise
 
     if not transcription:
+        if frame_stage:
+            frame_stage.abort()
         log("✗ Transcrição retornou vazia!")
         raise Exception("Transcrição falhou - resultado vazio")
     
     log(f"✓ Transcrição concluída com {len(transcription)} segmentos")
 
+    frames_dir = None
+    if frame_stage:
+        log("Aguardando captura de quadros...")
+        with span("frames_wait"):
+            frames_dir = frame_stage.finish(transcription)
+
     # Processa conteúdo da transcrição
     if isinstance(transcription, list):
         if all(isinstance(item, dict) and "text" in item for item in transcription):
@@ -54,8 +118,9 @@ def process_video(video_path, progress_callback=None, log_callback=None):
     prompt_blog = "poderia transformar essa transcrição em um artigo para blog? com titulo e tudo mais ? focado em SEO do google?\n\n"
     blog_txt = os.path.join(output_dir, "arquivo para blog.txt")
     try:
-        with open(blog_txt, "w", encoding="utf-8") as f:
+        with span("write_output", file=blog_txt) as trace, open(blog_txt, "w", encoding="utf-8") as f:
             f.write(prompt_blog + conteudo)
+            trace.add(bytes=f.tell())
         log(f"✓ Arquivo blog criado: {blog_txt}")
     except Exception as e:
         log(f"✗ Erro ao escrever blog_txt: {e}")
@@ -69,8 +134,9 @@ def process_video(video_path, progress_callback=None, log_callback=None):
     )
     hotmart_txt = os.path.join(output_dir, "hotmart.txt")
     try:
-        with open(hotmart_txt, "w", encoding="utf-8") as f:
+        with span("write_output", file=hotmart_txt) as trace, open(hotmart_txt, "w", encoding="utf-8") as f:
             f.write(prompt_hotmart + conteudo)
+            trace.add(bytes=f.tell())
         log(f"✓ Arquivo Hotmart criado: {hotmart_txt}")
     except Exception as e:
         log(f"✗ Erro ao escrever hotmart_txt: {e}")
@@ -84,8 +150,9 @@ def process_video(video_path, progress_callback=None, log_callback=None):
     )
     you_tube_txt = os.path.join(output_dir, "youTube.txt")
     try:
-        with open(you_tube_txt, "w", encoding="utf-8") as f:
+        with span("write_output", file=you_tube_txt) as trace, open(you_tube_txt, "w", encoding="utf-8") as f:
             f.write(prompt_you_tube + conteudo)
+            trace.add(bytes=f.tell())
         log(f"✓ Arquivo YouTube criado: {you_tube_txt}")
     except Exception as e:
         log(f"✗ Erro ao escrever you_tube_txt: {e}")
@@ -97,4 +164,45 @@ def process_video(video_path, progress_callback=None, log_callback=None):
     # Toca som final de sucesso (diferente do som de conclusão da transcrição)
     play_notification_sound("success")
     
-    return transcription, blog_txt, hotmart_txt, you_tube_txt, output_dir
\ No newline at end of file
+    return transcription, blog_txt, hotmart_txt, you_tube_txt, output_dir, frames_dir
+
+def transcribe_with_cache(video_path, progress_callback=None, chunk_callback=None):
+    """Transcreve o vídeo, consultando antes o cache de resultados
+
+    Só transcrições completas são gravadas: com trechos que falharam, o
+    resultado parcial é devolvido com um aviso e não entra no cache.
+    """
+    transcription = None
+    cache_key = None
+    if get_setting("cache", "result_cache"):
+        try:
+            with span("result_cache_lookup") as trace:
+                options = get_transcription_options()
+                cache_key = make_cache_key(video_path, options)
+                transcription = get_cached_transcription(cache_key)
+                trace.set(hit=bool(transcription))
+        except Exception as e:
+            log(f"⚠ Cache de resultados indisponível: {e}")
+
+    if transcription:
+        log("♻ Transcrição carregada do cache de resultados")
+        if progress_callback:
+            progress_callback(100)
+        return transcription
+
+    # Transcreve o áudio
+    log("Iniciando transcrição de áudio...")
+    report = {}
+    transcription = transcribe_audio_with_timestamps(video_path, progress_callback, chunk_callback, report)
+
+    if report["failed"]:
+        gaps = ", ".join(f"{start:.0f}-{end:.0f}s" for start, end in report["failed"][:5])
+        log(f"⚠ Transcrição incompleta: {len(report['failed'])} trechos sem texto ({gaps}); "
+            "resultado não gravado no cache, processe o vídeo novamente para completá-lo")
+    elif transcription and cache_key:
+        try:
+            with span("result_cache_store"):
+                store_transcription(cache_key, transcription, {"video_path": video_path, "options": options})
+        except Exception as e:
+            log(f"⚠ Não foi possível gravar no cache de resultados: {e}")
+    return transcription
@@ -0,0 +1,43 @@
+"""
+Daemon de transcrição: mantém o modelo carregado e atende jobs da interface
+e da linha de comando.
+
+Uso:
+    python -m daemon [--workers N] [--threads T]
+"""
+
+import sys
+import argparse
+import multiprocessing
+
+def main(argv=None):
+    from service.config_service import get_setting
+
+    parser = argparse.ArgumentParser(
+        prog="python -m daemon",
+        description="Carrega o modelo uma vez e processa jobs recebidos por socket"
+    )
+    parser.add_argument("--workers", type=int, default=get_setting("daemon", "workers", 1),
+                        help="processos worker que compartilham o modelo")
+    parser.add_argument("--threads", type=int, default=get_setting("daemon", "threads_per_worker", 0),
+                        help="threads do PyTorch por worker (0 = núcleos / workers)")
+    args = parser.parse_args(argv)
+
+    from service.daemon_service import TranscriptionDaemon, get_daemon_address, socket_in_use
+
+    # Verificado antes de carregar o modelo; serve_forever confere de novo ao abrir o socket
+    address = get_daemon_address()
+    if isinstance(address, str) and socket_in_use(address):
+        print(f"Já existe um daemon atendendo em {address}", file=sys.stderr)
+        return 1
+
+    daemon = TranscriptionDaemon(workers=args.workers, threads_per_worker=args.threads).start()
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+Streaming de PCM: o FFmpeg escreve áudio bruto no stdout e uma thread leitora
+preenche um ring buffer de tamanho fixo com janelas de 30s.
+
+Memória e disco ficam constantes independentemente da duração do vídeo: quando
+o buffer enche, a leitora bloqueia, o pipe enche e o FFmpeg pausa (backpressure).
+"""
+
+import time
+import subprocess
+import threading
+import numpy as np
+from service.trace_service import span
+
+class PcmRingBuffer:
+    """Ring buffer com janelas de áudio float32 pré-alocadas"""
+
+    def __init__(self, window_samples, slots=4):
+        self.window_samples = window_samples
+        self.slots = max(2, int(slots))
+        self._windows = np.zeros((self.slots, window_samples), dtype=np.float32)
+        self._lengths = [0] * self.slots
+        self._starts = [0] * self.slots
+        self._head = 0    # slot sendo (ou a ser) consumido
+        self._count = 0   # slots preenchidos e ainda não liberados
+        self._closed = False
+        self._aborted = False
+        self._error = None
+        self._cond = threading.Condition()
+
+    def acquire_write_slot(self):
+        """Aguarda um slot livre para escrita; retorna None se abortado"""
+        with self._cond:
+            while self._count == self.slots and not self._aborted:
+                self._cond.wait()
+            if self._aborted:
+                return None
+            return (self._head + self._count) % self.slots
+
+    def window_view(self, slot):
+        return self._windows[slot]
+
+    def commit(self, slot, length, start_sample):
+        """Publica um slot preenchido para o consumidor"""
+        with self._cond:
+            self._lengths[slot] = length
+            self._starts[slot] = start_sample
+            self._count += 1
+            self._cond.notify_all()
+
+    def acquire_read(self):
+        """Aguarda a próxima janela; retorna (slot, tamanho, amostra inicial) ou None no fim"""
+        with self._cond:
+            while self._count == 0 and not self._closed and not self._aborted:
+                self._cond.wait()
+            if self._count == 0:
+                if self._error is not None:
+                    raise self._error
+                return None
+            slot = self._head
+            return slot, self._lengths[slot], self._starts[slot]
+
+    def release_read(self):
+        """Devolve a janela consumida para reutilização pela leitora"""
+        with self._cond:
+            self._head = (self._head + 1) % self.slots
+            self._count -= 1
+            self._cond.notify_all()
+
+    def close(self, error=None):
+        """Sinaliza fim do stream (ou erro) para o consumidor"""
+        with self._cond:
+            self._closed = True
+            if error is not None:
+                self._error = error
+            self._cond.notify_all()
+
+    def abort(self):
+        """Interrompe produtor e consumidor"""
+        with self._cond:
+            self._aborted = True
+            self._cond.notify_all()
+
+class FfmpegPcmStream:
+    """Decodifica o áudio de um vídeo por pipe e entrega janelas de tamanho fixo"""
+
+    def __init__(self, video_path, ffmpeg_cmd="ffmpeg", sample_rate=16000, window_seconds=30, slots=4,
+                 stats=None):
+        self.video_path = video_path
+        # StageStats opcional (Pipeline.observe): leitura do pipe = ocupado,
+        # espera por slot livre = aguardando saída
+        self.stats = stats
+        self.ffmpeg_cmd = ffmpeg_cmd
+        self.sample_rate = sample_rate
+        self.window_samples = int(window_seconds * sample_rate)
+        self.ring = PcmRingBuffer(self.window_samples, slots)
+        self.process = None
+        self._reader = None
+        self._stderr_reader = None
+        self._stderr_tail = []
+
+    def start(self):
+        """Inicia o FFmpeg e a thread leitora"""
+        cmd = [
+            self.ffmpeg_cmd,
+            "-nostdin",
+            "-v", "error",
+            "-i", self.video_path,
+            "-vn",
+            "-ac", "1",
+            "-ar", str(self.sample_rate),
+            "-f", "f32le",
+            "-acodec", "pcm_f32le",
+            "pipe:1",
+        ]
+        self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        self._stderr_reader = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_reader.start()
+        self._reader = threading.Thread(target=self._read_loop, name="ffmpeg-pcm-reader", daemon=True)
+        self._reader.start()
+        return self
+
+    def _drain_stderr(self):
+        # Evita que o pipe de stderr encha e trave o FFmpeg
+        for line in self.process.stderr:
+            self._stderr_tail.append(line.decode("utf-8", errors="replace").rstrip())
+            del self._stderr_tail[:-20]
+
+    def _read_loop(self):
+        stdout = self.process.stdout
+        bytes_per_window = self.window_samples * 4
+        start_sample = 0
+        stats = self.stats
+        if stats:
+            stats.started = time.perf_counter()
+        try:
+            while True:
+                started = time.perf_counter()
+                slot = self.ring.acquire_write_slot()
+                if stats:
+                    stats.waiting_output += time.perf_counter() - started
+                if slot is None:
+                    return
+
+                view = memoryview(self.ring.window_view(slot)).cast("B")
+                filled = 0
+                started = time.perf_counter()
+                with span("stream_decode", start=start_sample / self.sample_rate) as trace:
+                    while filled < bytes_per_window:
+                        read = stdout.readinto(view[filled:])
+                        if not read:
+                            break
+                        filled += read
+                    trace.add(bytes=filled, audio_seconds=filled / 4 / self.sample_rate)
+                if stats:
+                    stats.busy += time.perf_counter() - started
+                    stats.items += 1 if filled else 0
+
+                # Descarta bytes que não completam uma amostra float32
+                samples = filled // 4
+                if samples:
+                    self.ring.commit(slot, samples, start_sample)
+                    start_sample += samples
+                if filled < bytes_per_window:
+                    break
+
+            return_code = self.process.wait()
+            if self._stderr_reader:
+                self._stderr_reader.join(timeout=5)
+            if return_code != 0:
+                details = " | ".join(self._stderr_tail) or f"código {return_code}"
+                self.ring.close(Exception(f"FFmpeg falhou ao decodificar áudio: {details}"))
+            else:
+                self.ring.close()
+        except Exception as e:
+            self.ring.close(e)
+        finally:
+            if stats:
+                stats.finished = time.perf_counter()
+
+    def windows(self):
+        """Gera segmentos no mesmo formato de split_audio_segments
+
+        A fatia de áudio de cada segmento só é válida até o próximo item ser
+        solicitado: nesse momento o slot volta para a leitora.
+        """
+        try:
+            while True:
+                item = self.ring.acquire_read()
+                if item is None:
+                    return
+                slot, length, start_sample = item
+                try:
+                    yield {
+                        'audio': self.ring.window_view(slot)[:length],
+                        'start_offset': start_sample / self.sample_rate,
+                        'end_offset': (start_sample + length) / self.sample_rate,
+                    }
+                finally:
+                    self.ring.release_read()
+        finally:
+            self.close()
+
+    def close(self):
+        """Encerra o FFmpeg e a thread leitora"""
+        self.ring.abort()
+        if self.process and self.process.poll() is None:
+            try:
+                self.process.kill()
+                self.process.wait(timeout=5)
+            except Exception:
+                pass
+        if self._reader and self._reader is not threading.current_thread():
+            self._reader.join(timeout=5)
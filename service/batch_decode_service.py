@@ -0,0 +1,311 @@
+"""
+Decodificação em lote: empilha N janelas log-mel de 30s e executa encoder e
+decoder sobre todas de uma vez, aproveitando melhor as unidades SIMD da CPU.
+
+O laço guloso remove do lote cada item que emite EOT (early stopping por item),
+de modo que janelas curtas ou silenciosas não pagam pelo decode das longas.
+"""
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+import whisper
+from whisper.audio import N_FRAMES, HOP_LENGTH, SAMPLE_RATE
+from whisper.decoding import SuppressBlank, SuppressTokens, ApplyTimestampRules
+from whisper.tokenizer import get_tokenizer, TO_LANGUAGE_CODE
+from whisper.utils import compression_ratio
+from service.hardware_service import get_available_memory_mb
+from service.log_service import log
+from service.trace_service import span
+
+# Duração de cada token de timestamp (20 ms)
+TIME_PRECISION = 2 * HOP_LENGTH / SAMPLE_RATE
+
+# Memória aproximada de ativações por janela no lote (MB)
+BATCH_ITEM_MEMORY_MB = {
+    "tiny": 60,
+    "base": 90,
+    "small": 180,
+    "medium": 350,
+    "large": 600,
+}
+
+MAX_AUTO_BATCH_SIZE = 16
+
+# Limiares equivalentes aos do model.transcribe para acionar o fallback
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+# Final de janela não decodificado (s) a partir do qual ele é refeito individualmente
+TRAILING_GAP_SECONDS = 1.0
+
+def auto_batch_size(model_size, configured=0):
+    """Define o tamanho do lote: valor configurado ou ajustado à RAM disponível"""
+    if configured and configured > 0:
+        return configured
+
+    per_item = BATCH_ITEM_MEMORY_MB.get(model_size.split(".")[0].split("-")[0], BATCH_ITEM_MEMORY_MB["large"])
+    available = get_available_memory_mb()
+    if not available:
+        return 4
+    # Usa no máximo metade da memória livre para as ativações do lote
+    return int(max(1, min(MAX_AUTO_BATCH_SIZE, (available * 0.5) // per_item)))
+
+def consumed_until(tokens, timestamp_begin, duration):
+    """Até onde a janela foi transcrita (s, relativo à janela)
+
+    Terminar em um par de timestamps significa que o modelo deixou o restante
+    da janela para a próxima passada (o model.transcribe avança só até o último
+    timestamp); nos demais casos a janela inteira foi consumida.
+    """
+    if len(tokens) >= 2 and tokens[-1] >= timestamp_begin and tokens[-2] >= timestamp_begin:
+        return min((tokens[-1] - timestamp_begin) * TIME_PRECISION, duration)
+    return duration
+
+def _language_code(language):
+    if not language:
+        return None
+    language = language.lower()
+    return TO_LANGUAGE_CODE.get(language, language)
+
+class BatchDecoder:
+    """Decodificador guloso em lote com timestamps"""
+
+    def __init__(self, model, language="pt", fp16=False):
+        self.model = model
+        self.dtype = torch.float16 if fp16 else torch.float32
+        self.tokenizer = get_tokenizer(
+            model.is_multilingual,
+            num_languages=model.num_languages,
+            language=_language_code(language) or "pt",
+            task="transcribe",
+        )
+        self.initial_tokens = list(self.tokenizer.sot_sequence)
+        self.sample_begin = len(self.initial_tokens)
+        self.sample_len = model.dims.n_text_ctx // 2
+        self.n_ctx = model.dims.n_text_ctx
+
+        suppress_tokens = list(self.tokenizer.non_speech_tokens) + [
+            self.tokenizer.transcribe,
+            self.tokenizer.translate,
+            self.tokenizer.sot,
+            self.tokenizer.sot_prev,
+            self.tokenizer.sot_lm,
+        ]
+        if self.tokenizer.no_speech is not None:
+            suppress_tokens.append(self.tokenizer.no_speech)
+
+        self.logit_filters = [
+            SuppressBlank(self.tokenizer, self.sample_begin),
+            SuppressTokens(sorted(set(suppress_tokens))),
+            ApplyTimestampRules(self.tokenizer, self.sample_begin, round(1.0 / TIME_PRECISION)),
+        ]
+
+    def mel(self, audio):
+        """Log-mel de uma janela de até 30s, já no tamanho de entrada do encoder"""
+        audio = whisper.pad_or_trim(np.ascontiguousarray(audio, dtype=np.float32))
+        mel = whisper.log_mel_spectrogram(audio, self.model.dims.n_mels, device=self.model.device)
+        return mel[:, :N_FRAMES]
+
+    @torch.no_grad()
+    def decode(self, mels):
+        """Decodifica um lote de espectrogramas (B, n_mels, 3000)
+
+        Retorna, para cada item, um dict com tokens, avg_logprob e no_speech_prob.
+        """
+        n_batch = mels.shape[0]
+        audio_features = self.model.embed_audio(mels.to(self.model.device, dtype=self.dtype))
+        tokens = torch.tensor([self.initial_tokens], device=audio_features.device).repeat(n_batch, 1)
+        sum_logprobs = torch.zeros(n_batch, device=audio_features.device)
+        no_speech_probs = [float("nan")] * n_batch
+
+        # Índices originais dos itens ainda ativos no lote
+        active = list(range(n_batch))
+        results = [None] * n_batch
+        kv_cache, hooks = self.model.install_kv_cache_hooks()
+
+        try:
+            for step in range(self.sample_len):
+                step_tokens = tokens if step == 0 else tokens[:, -1:]
+                logits = self.model.decoder(step_tokens, audio_features, kv_cache=kv_cache)
+
+                if step == 0 and self.tokenizer.no_speech is not None:
+                    probs_at_sot = logits[:, 0].float().softmax(dim=-1)
+                    no_speech_probs = probs_at_sot[:, self.tokenizer.no_speech].tolist()
+
+                logits = logits[:, -1]
+                for logit_filter in self.logit_filters:
+                    logit_filter.apply(logits, tokens)
+
+                next_tokens = logits.argmax(dim=-1)
+                logprobs = F.log_softmax(logits.float(), dim=-1)
+                sum_logprobs += logprobs[torch.arange(len(active)), next_tokens]
+                tokens = torch.cat([tokens, next_tokens[:, None]], dim=-1)
+
+                finished = next_tokens == self.tokenizer.eot
+                if step == self.sample_len - 1 or tokens.shape[-1] > self.n_ctx:
+                    finished[:] = True
+
+                if not finished.any():
+                    continue
+
+                for row in torch.nonzero(finished).flatten().tolist():
+                    item = active[row]
+                    sampled = tokens[row, self.sample_begin:].tolist()
+                    if sampled and sampled[-1] == self.tokenizer.eot:
+                        sampled = sampled[:-1]
+                    results[item] = {
+                        "tokens": sampled,
+                        "avg_logprob": sum_logprobs[row].item() / (len(sampled) + 1),
+                        "no_speech_prob": no_speech_probs[item],
+                    }
+
+                # Early stopping por item: remove do lote (e do kv-cache) quem terminou
+                keep = torch.nonzero(~finished).flatten()
+                if keep.numel() == 0:
+                    break
+                active = [active[row] for row in keep.tolist()]
+                tokens = tokens[keep]
+                sum_logprobs = sum_logprobs[keep]
+                audio_features = audio_features[keep]
+                for module in kv_cache:
+                    kv_cache[module] = kv_cache[module][keep].detach()
+        finally:
+            for hook in hooks:
+                hook.remove()
+
+        return results
+
+    def to_segments(self, tokens, duration):
+        """Converte tokens com timestamps em segmentos relativos à janela"""
+        timestamp_begin = self.tokenizer.timestamp_begin
+        segments = []
+        segment_start = None
+        text_tokens = []
+
+        for token in tokens:
+            if token >= timestamp_begin:
+                time = (token - timestamp_begin) * TIME_PRECISION
+                if text_tokens and segment_start is not None:
+                    segments.append((segment_start, time, text_tokens))
+                    text_tokens = []
+                    segment_start = None
+                else:
+                    segment_start = time
+            elif token < self.tokenizer.eot:
+                text_tokens.append(token)
+
+        if text_tokens:
+            segments.append((segment_start or 0.0, duration, text_tokens))
+
+        return [
+            {
+                "start": min(start, duration),
+                "end": min(max(end, start), duration),
+                "text": self.tokenizer.decode(text),
+            }
+            for start, end, text in segments
+        ]
+
+def transcribe_segments_batched(model, segments, batch_size, progress_callback=None, total_duration=None, decode_options=None,
+                                chunk_callback=None):
+    """Transcreve segmentos em lotes, ajustando timestamps pelo `start_offset`
+
+    Janelas com sinais de alucinação (compressão alta ou logprob baixo) são
+    refeitas individualmente com model.transcribe, que aplica o fallback de
+    temperatura; se a decodificação termina antes do fim da janela (par de
+    timestamps), o restante é transcrito da mesma forma. `chunk_callback(
+    start_offset, end_offset, partes)` é chamado a cada janela concluída.
+    """
+    decode_options = decode_options or {}
+    decoder = BatchDecoder(model, decode_options.get("language", "pt"), decode_options.get("fp16", False))
+    all_transcription = []
+    batch = []
+    processed = 0
+
+    def flush():
+        nonlocal processed
+        if not batch:
+            return
+        log(f"Decodificando lote de {len(batch)} janelas ({batch[0]['start_offset']:.2f}-{batch[-1]['end_offset']:.2f}s)")
+        try:
+            audio_seconds = sum(item["end_offset"] - item["start_offset"] for item in batch)
+            with span("transcribe_batch", windows=len(batch), audio_seconds=audio_seconds,
+                      start=batch[0]["start_offset"], end=batch[-1]["end_offset"]):
+                results = decoder.decode(torch.stack([item["mel"] for item in batch]))
+        except Exception as e:
+            log(f"✗ Erro ao decodificar lote: {e}")
+            results = [None] * len(batch)
+
+        for item, result in zip(batch, results):
+            duration = item["end_offset"] - item["start_offset"]
+            if result is not None:
+                text = decoder.tokenizer.decode([t for t in result["tokens"] if t < decoder.tokenizer.eot])
+                if result["no_speech_prob"] > NO_SPEECH_THRESHOLD and result["avg_logprob"] < LOGPROB_THRESHOLD:
+                    log(f"Janela {item['start_offset']:.2f}s sem fala, ignorada")
+                    if chunk_callback:
+                        chunk_callback(item["start_offset"], item["end_offset"], [])
+                    continue
+                needs_fallback = (
+                    compression_ratio(text) > COMPRESSION_RATIO_THRESHOLD
+                    or result["avg_logprob"] < LOGPROB_THRESHOLD
+                )
+                parts = None if needs_fallback else decoder.to_segments(result["tokens"], duration)
+            else:
+                parts = None
+
+            if parts is not None:
+                tail = consumed_until(result["tokens"], decoder.tokenizer.timestamp_begin, duration)
+                if duration - tail > TRAILING_GAP_SECONDS:
+                    log(f"Janela {item['start_offset']:.2f}s decodificada até {tail:.2f}s; refazendo o final individualmente")
+                    try:
+                        with span("transcribe_fallback", audio_seconds=duration - tail, start=item["start_offset"] + tail):
+                            tail_parts = model.transcribe(item["audio"][int(tail * SAMPLE_RATE):],
+                                                          **decode_options)["segments"]
+                    except Exception as e:
+                        log(f"✗ Erro ao transcrever o final do segmento {item['start_offset']:.2f}s: {e}")
+                        continue
+                    parts += [dict(seg, start=seg["start"] + tail, end=seg["end"] + tail) for seg in tail_parts]
+
+            if parts is None:
+                log(f"Refazendo janela {item['start_offset']:.2f}s individualmente (fallback de temperatura)")
+                try:
+                    with span("transcribe_fallback", audio_seconds=duration, start=item["start_offset"]):
+                        parts = model.transcribe(item["audio"], **decode_options)["segments"]
+                except Exception as e:
+                    log(f"✗ Erro ao transcrever segmento {item['start_offset']:.2f}s: {e}")
+                    continue
+
+            parts = [
+                {
+                    "start": seg["start"] + item["start_offset"],
+                    "end": seg["end"] + item["start_offset"],
+                    "text": seg["text"],
+                }
+                for seg in parts
+            ]
+            all_transcription.extend(parts)
+            if chunk_callback:
+                chunk_callback(item["start_offset"], item["end_offset"], parts)
+
+        processed += len(batch)
+        if progress_callback and total_duration:
+            progress_callback(min(99, int((batch[-1]["end_offset"] / total_duration) * 100)))
+        batch.clear()
+
+    for segment_info in segments:
+        # A fatia pode ser um slot do ring buffer: copia antes de avançar o iterador
+        audio = np.array(segment_info['audio'], dtype=np.float32)
+        batch.append({
+            "audio": audio,
+            "mel": decoder.mel(audio),
+            "start_offset": segment_info['start_offset'],
+            "end_offset": segment_info['end_offset'],
+        })
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    log(f"✓ {processed} janelas decodificadas em lotes de até {batch_size}")
+    return all_transcription
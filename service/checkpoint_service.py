@@ -0,0 +1,112 @@
+"""
+Checkpoint de transcrições longas
+
+Cada trecho concluído é anexado a um diário (JSON Lines) do job. O arquivo é
+descarregado a cada registro (sobrevive à queda do processo) e sincronizado
+com fsync em lotes (sobrevive à queda do sistema sem custo de fsync por
+trecho). Ao repetir o mesmo job, os trechos já registrados são pulados e seus
+resultados reaproveitados.
+"""
+
+import os
+import json
+import time
+from service.log_service import log
+from service.trace_service import span
+
+def _chunk_id(start_offset, end_offset):
+    # Milissegundos evitam divergências de ponto flutuante entre execuções
+    return f"{round(start_offset * 1000)}-{round(end_offset * 1000)}"
+
+class ChunkJournal:
+    """Diário append-only dos trechos concluídos de um job"""
+
+    def __init__(self, path, sync_every=8, sync_interval=5.0):
+        self.path = path
+        self.sync_every = max(1, int(sync_every))
+        self.sync_interval = sync_interval
+        self.completed = {}
+        self.skipped = 0
+        self._pending_sync = 0
+        self._last_sync = time.monotonic()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Última linha incompleta (queda durante a escrita)
+                    break
+                self.completed[record["chunk"]] = record["segments"]
+                valid_bytes += len(line)
+        # Remove o final corrompido para que novos registros comecem em linha própria
+        if valid_bytes < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+        if self.completed:
+            log(f"♻ Checkpoint encontrado: {len(self.completed)} trechos já transcritos")
+
+    def is_done(self, segment_info):
+        return _chunk_id(segment_info['start_offset'], segment_info['end_offset']) in self.completed
+
+    def pending(self, segments):
+        """Filtra os segmentos que ainda não foram transcritos"""
+        for segment_info in segments:
+            if self.is_done(segment_info):
+                self.skipped += 1
+                continue
+            yield segment_info
+
+    def missing(self, chunks):
+        """Intervalos (início, fim) ainda sem registro no diário"""
+        return [chunk for chunk in chunks if _chunk_id(*chunk) not in self.completed]
+
+    def record(self, start_offset, end_offset, parts):
+        """Registra o resultado de um trecho (timestamps já ajustados pelo offset)"""
+        chunk = _chunk_id(start_offset, end_offset)
+        self.completed[chunk] = parts
+        self._file.write(json.dumps({"chunk": chunk, "segments": parts}, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+        self._pending_sync += 1
+        if (self._pending_sync >= self.sync_every
+                or time.monotonic() - self._last_sync >= self.sync_interval):
+            self.sync()
+
+    def sync(self):
+        if self._pending_sync:
+            with span("checkpoint_fsync", chunks=self._pending_sync):
+                os.fsync(self._file.fileno())
+            self._pending_sync = 0
+        self._last_sync = time.monotonic()
+
+    def results(self):
+        """Todos os segmentos registrados, em ordem de timestamp"""
+        merged = [seg for parts in self.completed.values() for seg in parts]
+        merged.sort(key=lambda seg: seg["start"])
+        return merged
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+    def discard(self):
+        """Remove o diário após o job terminar com sucesso"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+def open_journal(job_key, journal_dir, sync_every=8):
+    return ChunkJournal(os.path.join(journal_dir, f"{job_key}.jsonl"), sync_every=sync_every)
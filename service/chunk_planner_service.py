@@ -0,0 +1,122 @@
+"""
+Planejamento de trechos para o Whisper
+
+Em vez de cortes fixos a cada 30s (que partem palavras ao meio e provocam
+re-decodificações por fallback de temperatura), os cortes são posicionados no
+ponto de menor energia dentro de uma janela próxima do limite de 30s do
+encoder. Com os trechos de fala do VAD, enunciados curtos são agrupados no
+mesmo trecho e o silêncio entre grupos é descartado.
+
+O plano é uma lista de dicts {'start_sample', 'end_sample', 'start_offset',
+'end_offset'} consumida pelo restante do pipeline.
+"""
+
+import numpy as np
+from service.vad_service import frame_features, FRAME_MS
+
+# Limite do contexto do encoder do Whisper
+MAX_CHUNK_SECONDS = 30
+
+# Tamanho da janela (antes do limite) onde o corte é procurado
+CUT_SEARCH_SECONDS = 6
+
+# Média móvel da energia, em quadros, para evitar cortes em pausas de 1 quadro
+ENERGY_SMOOTHING_FRAMES = 7
+
+def _entry(start_sample, end_sample, sample_rate):
+    return {
+        'start_sample': int(start_sample),
+        'end_sample': int(end_sample),
+        'start_offset': start_sample / sample_rate,
+        'end_offset': end_sample / sample_rate,
+    }
+
+def find_cut(audio, min_samples, sample_rate=16000):
+    """Posição (em amostras) de menor energia entre `min_samples` e o fim de `audio`"""
+    energy, _ = frame_features(audio, sample_rate)
+    frame_len = int(sample_rate * FRAME_MS / 1000)
+    if len(energy) == 0:
+        return len(audio)
+
+    kernel = np.ones(ENERGY_SMOOTHING_FRAMES, dtype=np.float32) / ENERGY_SMOOTHING_FRAMES
+    smoothed = np.convolve(energy, kernel, mode='same')
+
+    first_frame = min(len(smoothed) - 1, min_samples // frame_len)
+    best = first_frame + int(np.argmin(smoothed[first_frame:]))
+    # Corta no centro do quadro mais silencioso
+    return min(len(audio), best * frame_len + frame_len // 2)
+
+def fixed_chunk_plan(total_samples, sample_rate=16000, chunk_seconds=MAX_CHUNK_SECONDS):
+    """Plano de cortes fixos (comportamento original)"""
+    chunk_samples = int(chunk_seconds * sample_rate)
+    return [
+        _entry(start, min(start + chunk_samples, total_samples), sample_rate)
+        for start in range(0, total_samples, chunk_samples)
+    ]
+
+def plan_chunks(audio, sample_rate=16000, max_seconds=MAX_CHUNK_SECONDS,
+                search_seconds=CUT_SEARCH_SECONDS, speech_spans=None):
+    """Planeja trechos de até `max_seconds` com cortes em pontos de baixa energia
+
+    `speech_spans` (lista de (início, fim) em amostras, do VAD) permite agrupar
+    enunciados curtos e descartar o silêncio entre os grupos.
+    """
+    max_samples = int(max_seconds * sample_rate)
+    min_samples = max(0, max_samples - int(search_seconds * sample_rate))
+    if speech_spans is None:
+        speech_spans = [(0, len(audio))]
+
+    plan = []
+
+    def emit(start, end):
+        # Trechos maiores que o contexto do encoder são cortados no ponto mais silencioso
+        while end - start > max_samples:
+            cut = start + find_cut(audio[start:start + max_samples], min_samples, sample_rate)
+            plan.append(_entry(start, cut, sample_rate))
+            start = cut
+        if end > start:
+            plan.append(_entry(start, end, sample_rate))
+
+    group_start = group_end = None
+    for span_start, span_end in speech_spans:
+        if group_start is None:
+            group_start, group_end = span_start, span_end
+        elif span_end - group_start <= max_samples:
+            # Enunciado cabe no trecho atual: agrupa
+            group_end = span_end
+        else:
+            emit(group_start, group_end)
+            group_start, group_end = span_start, span_end
+    if group_start is not None:
+        emit(group_start, group_end)
+
+    return plan
+
+def rechunk_stream(segments, sample_rate=16000, max_seconds=MAX_CHUNK_SECONDS,
+                   search_seconds=CUT_SEARCH_SECONDS):
+    """Versão incremental de plan_chunks para janelas contíguas do modo streaming
+
+    Mantém apenas o áudio ainda não emitido (no máximo um trecho), portanto a
+    memória continua constante. Cada segmento gerado tem áudio próprio.
+    """
+    max_samples = int(max_seconds * sample_rate)
+    min_samples = max(0, max_samples - int(search_seconds * sample_rate))
+    carry = np.zeros(0, dtype=np.float32)
+    carry_start = 0
+
+    def chunk(audio, start_sample):
+        return dict(_entry(start_sample, start_sample + len(audio), sample_rate), audio=audio)
+
+    for segment_info in segments:
+        if len(carry) == 0:
+            carry_start = int(round(segment_info['start_offset'] * sample_rate))
+        carry = np.concatenate([carry, np.asarray(segment_info['audio'], dtype=np.float32)])
+
+        while len(carry) > max_samples:
+            cut = find_cut(carry[:max_samples], min_samples, sample_rate)
+            yield chunk(carry[:cut], carry_start)
+            carry = carry[cut:]
+            carry_start += cut
+
+    if len(carry):
+        yield chunk(carry, carry_start)
@@ -0,0 +1,156 @@
+"""
+Leitura das configurações da aplicação (config.ini)
+"""
+
+import os
+import configparser
+
+CONFIG_PATH = "config.ini"
+
+# Valores padrão; o tipo de cada valor define como o config.ini é interpretado
+DEFAULT_CONFIG = {
+    "whisper": {
+        "model_size": "small",
+        "language": "pt",
+        "word_timestamps": False,
+    },
+    "performance": {
+        # Transcreve janelas conforme o FFmpeg decodifica (memória constante)
+        "streaming": False,
+        # Quantidade de janelas de 30s no ring buffer do modo streaming
+        "stream_buffer_windows": 4,
+        # Cortes em pontos de silêncio próximos de 30s em vez de cortes fixos
+        "adaptive_chunking": False,
+        # Descarta trechos sem fala (VAD) antes da inferência
+        "vad": False,
+        # Decodificação, preparação e transcrição em estágios sobrepostos (threads + fila limitada)
+        "pipeline": False,
+        # Trechos prontos aguardando o próximo estágio do pipeline
+        "pipeline_queue_size": 2,
+        # Precisão do modelo: auto, fp16 ou fp32
+        "model_precision": "auto",
+        # Orçamento de memória do cache de modelos (0 = metade da RAM)
+        "model_cache_budget_mb": 0,
+        # Motor de transcrição: sequential, batched ou parallel
+        "engine": "sequential",
+        # Janelas por lote no motor batched (0 = ajuste automático pela RAM)
+        "batch_size": 0,
+        # Processos do motor parallel (0 = núcleos / threads por processo)
+        "parallel_workers": 0,
+        # Threads do PyTorch (núcleos exclusivos) por processo do motor parallel
+        "parallel_threads_per_worker": 4,
+    },
+    "cache": {
+        # Reutiliza transcrições de arquivos já processados (mesmo conteúdo e opções)
+        "result_cache": True,
+        # Diretório das entradas do cache de resultados
+        "result_cache_dir": os.path.join("cache", "transcriptions"),
+        # Tamanho máximo do cache de resultados (entradas menos usadas são removidas)
+        "result_cache_max_mb": 500,
+        # Registra cada trecho concluído para retomar jobs interrompidos
+        "checkpoint": True,
+        # Diretório dos diários de checkpoint
+        "checkpoint_dir": os.path.join("cache", "checkpoints"),
+        # Trechos registrados entre cada fsync do diário
+        "checkpoint_sync_every": 8,
+        # Índice SQLite com o resultado do ffprobe por (caminho, tamanho, mtime)
+        "media_index": os.path.join("cache", "media_index.sqlite"),
+        # FFmpeg/ffprobe, CPU e backends do PyTorch detectados (revalidados por mtime)
+        "toolchain_cache": os.path.join("cache", "toolchain.json"),
+    },
+    "frames": {
+        # Captura de quadros durante a transcrição: off, segments, interval ou scenes
+        "capture": "off",
+        # Intervalo (s) entre quadros no modo interval
+        "capture_interval": 30.0,
+        # Descarta quadros quase idênticos (hash perceptual) antes de gravar
+        "dedup": True,
+        # Bits diferentes (de 64) abaixo dos quais dois quadros são iguais
+        "dedup_threshold": 6,
+        # Quadros-chave por mudança de cena: quantidade máxima
+        "scene_top_k": 12,
+        # Quadros analisados por segundo de vídeo
+        "scene_sample_fps": 1.0,
+        # Intervalo mínimo (s) entre dois quadros-chave
+        "scene_min_gap": 5.0,
+        # Tempo máximo (s) da análise de cenas (0 = sem limite)
+        "scene_time_budget": 0.0,
+        # Formato das imagens gravadas: jpg ou webp
+        "image_format": "jpg",
+        # Qualidade da codificação (0-100)
+        "image_quality": 90,
+        # Largura máxima das imagens (0 = tamanho original)
+        "image_width": 0,
+        # Threads de codificação (0 = até 4, conforme os núcleos)
+        "writer_threads": 0,
+        # Quadros aguardando codificação (limita a memória)
+        "writer_queue_size": 8,
+    },
+    "daemon": {
+        # A interface e a linha de comando enviam jobs ao daemon quando ele está rodando
+        "use_daemon": True,
+        # Socket Unix do daemon (Linux/macOS)
+        "socket_path": os.path.join("cache", "transcriber.sock"),
+        # Porta em localhost (Windows)
+        "port": 8765,
+        # Processos worker que compartilham o modelo
+        "workers": 1,
+        # Threads do PyTorch por worker (0 = núcleos / workers)
+        "threads_per_worker": 0,
+        # RAM (MB) para jobs simultâneos no daemon (0 = memória livre após carregar o modelo)
+        "memory_budget_mb": 0,
+        # Segundos de áudio descontados da prioridade por segundo de espera na fila
+        "scheduler_aging": 10.0,
+    },
+    "logging": {
+        # Nível mínimo exibido no log da interface (DEBUG, INFO, WARNING, ERROR)
+        "level": "INFO",
+        # Linhas mantidas no log da interface (as mais antigas são descartadas)
+        "gui_max_lines": 2000,
+        # Intervalo (ms) entre atualizações do log da interface
+        "gui_flush_ms": 100,
+        # Grava output/<vídeo>/trace.json com o tempo de cada etapa (Chrome/Perfetto)
+        "trace": False,
+    },
+}
+
+_config_cache = None
+
+def load_config(path=CONFIG_PATH, reload=False):
+    """Carrega o config.ini sobre os valores padrão (resultado em cache)"""
+    global _config_cache
+
+    if _config_cache is not None and not reload:
+        return _config_cache
+
+    config = {section: dict(values) for section, values in DEFAULT_CONFIG.items()}
+
+    if os.path.exists(path):
+        try:
+            parser = configparser.ConfigParser()
+            parser.read(path, encoding="utf-8")
+
+            for section, values in config.items():
+                if section not in parser:
+                    continue
+                parser_section = parser[section]
+                for key, default in values.items():
+                    if key not in parser_section:
+                        continue
+                    if isinstance(default, bool):
+                        values[key] = parser_section.getboolean(key)
+                    elif isinstance(default, int):
+                        values[key] = parser_section.getint(key)
+                    elif isinstance(default, float):
+                        values[key] = parser_section.getfloat(key)
+                    else:
+                        values[key] = parser_section.get(key)
+        except Exception as e:
+            print(f"⚠️ Erro ao ler {path}: {e} - usando configurações padrão")
+
+    _config_cache = config
+    return config
+
+def get_setting(section, key, default=None):
+    """Retorna uma configuração individual"""
+    return load_config().get(section, {}).get(key, default)
@@ -0,0 +1,80 @@
+"""
+Cliente do daemon de transcrição
+
+Não importa torch nem whisper: a interface e a linha de comando usam o daemon
+quando ele está rodando e só carregam o modelo localmente caso contrário.
+"""
+
+import os
+import json
+import socket
+from service.config_service import get_setting
+
+def _connect(timeout=None):
+    from service.daemon_service import get_daemon_address
+
+    address = get_daemon_address()
+    family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def request(message, timeout=None):
+    """Envia uma requisição e itera as mensagens de resposta"""
+    with _connect(timeout) as sock:
+        sock.sendall((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+        with sock.makefile("r", encoding="utf-8") as reader:
+            for line in reader:
+                yield json.loads(line)
+
+def daemon_available(timeout=0.2):
+    """Verifica se há um daemon respondendo (e se o uso está habilitado)"""
+    if not get_setting("daemon", "use_daemon"):
+        return False
+    try:
+        return any(m.get("event") == "pong" for m in request({"cmd": "ping"}, timeout))
+    except (OSError, ValueError):
+        return False
+
+def get_daemon_status(timeout=1.0):
+    for message in request({"cmd": "status"}, timeout):
+        return message
+    return None
+
+def process_video_remote(video_path, progress_callback=None, log_callback=None):
+    """Mesma semântica de process_video, executado pelo daemon
+
+    O daemon tem seu próprio diretório de trabalho: o vídeo é enviado com
+    caminho absoluto e os caminhos de saída voltam absolutos.
+    """
+    for event in request({"cmd": "process", "video_path": os.path.abspath(video_path)}):
+        kind = event.get("event")
+        if kind == "queued" and log_callback:
+            eta = event.get("eta")
+            eta_text = f", término estimado em {eta / 60:.1f} min" if eta is not None else ""
+            log_callback(f"Job {event['job']} na fila do daemon ({event.get('queue_depth', 0)} aguardando{eta_text})")
+        elif kind == "log" and log_callback:
+            log_callback(event["message"])
+        elif kind == "progress" and progress_callback:
+            progress_callback(event["value"])
+        elif kind == "error":
+            raise Exception(event["message"])
+        elif kind == "result":
+            return (event["transcription"], event["blog_txt"], event["hotmart_txt"],
+                    event["youtube_txt"], event["output_dir"], event.get("frames_dir"))
+    raise Exception("Conexão com o daemon encerrada antes do resultado")
+
+def process_video_auto(video_path, progress_callback=None, log_callback=None):
+    """Usa o daemon se disponível; caso contrário processa neste processo"""
+    if daemon_available():
+        if log_callback:
+            log_callback("Enviando job ao daemon de transcrição...")
+        return process_video_remote(video_path, progress_callback, log_callback)
+
+    from controller.transcribe_controller import process_video
+    return process_video(video_path, progress_callback, log_callback)
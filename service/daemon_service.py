@@ -0,0 +1,359 @@
+"""
+Daemon de transcrição
+
+Carrega o modelo uma única vez e cria N processos worker por fork, que
+compartilham os pesos copy-on-write. Um worker que morre é substituído por
+um processo spawn (o pai já tem threads), que carrega o modelo do disco. Jobs chegam por socket Unix (ou porta
+TCP em localhost quando não há AF_UNIX) como JSON por linha, com a mesma
+semântica de process_video; o cliente recebe eventos de log e progresso
+enquanto o job roda e, no fim, o resultado ou o erro.
+
+Protocolo (uma mensagem JSON por linha):
+    cliente -> {"cmd": "process", "video_path": "..."} | {"cmd": "ping"} | {"cmd": "status"}
+    daemon  -> {"event": "queued" | "log" | "progress" | "heartbeat" | "result" | "error", ...}
+
+A ordem dos jobs e a admissão por memória ficam a cargo do JobScheduler.
+"""
+
+import os
+import json
+import time
+import queue
+import socket
+import threading
+import itertools
+import socketserver
+import multiprocessing
+from service.log_service import log, set_log_callback
+from service.config_service import get_setting
+from service.parallel_transcribe_service import plan_core_slices, _get_context
+from service.scheduler_service import JobScheduler
+
+# Eventos que encerram um job para o cliente
+FINAL_EVENTS = ("result", "error")
+# Intervalo entre verificações de workers mortos
+REAP_INTERVAL = 1.0
+# Sem eventos por este tempo, o handler sonda o cliente com um heartbeat
+HEARTBEAT_INTERVAL = 15.0
+
+def get_daemon_address():
+    """Endereço do daemon: caminho do socket Unix ou (host, porta)"""
+    if hasattr(socket, "AF_UNIX") and os.name != "nt":
+        return get_setting("daemon", "socket_path", os.path.join("cache", "transcriber.sock"))
+    return ("127.0.0.1", get_setting("daemon", "port", 8765))
+
+def socket_in_use(address):
+    """Verifica se há um processo atendendo no socket Unix `address`
+
+    Um arquivo de socket que recusa conexões é resto de um daemon que não
+    terminou direito e pode ser removido.
+    """
+    if not os.path.exists(address):
+        return False
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(1.0)
+    try:
+        sock.connect(address)
+        return True
+    except (ConnectionRefusedError, FileNotFoundError):
+        return False
+    finally:
+        sock.close()
+
+def _absolute(path):
+    return os.path.abspath(path) if path else path
+
+def _worker_main(index, cores, jobs, events):
+    """Laço de um worker: executa process_video para cada job recebido"""
+    import torch
+    from controller.transcribe_controller import process_video
+    from service.whisper_service import set_notification_sound
+
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError:
+            pass
+    torch.set_num_threads(len(cores))
+    set_notification_sound(False)
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, video_path = job
+
+        def emit(event, **data):
+            events.put((job_id, dict(data, event=event)))
+
+        try:
+            transcription, blog_txt, hotmart_txt, youtube_txt, output_dir, frames_dir = process_video(
+                video_path,
+                progress_callback=lambda value: emit("progress", value=value),
+                log_callback=lambda message: emit("log", message=message),
+            )
+            # O cliente roda em outro diretório de trabalho: os caminhos vão absolutos
+            emit("result", transcription=transcription, blog_txt=_absolute(blog_txt),
+                 hotmart_txt=_absolute(hotmart_txt), youtube_txt=_absolute(youtube_txt),
+                 output_dir=_absolute(output_dir), frames_dir=_absolute(frames_dir))
+        except Exception as e:
+            emit("error", message=str(e))
+        finally:
+            set_log_callback(None)
+            events.put((job_id, {"event": "done", "worker": index}))
+
+class TranscriptionDaemon:
+    """Fila de jobs (escalonada por duração) repartida entre workers pré-criados"""
+
+    def __init__(self, workers=1, threads_per_worker=0):
+        self.workers = max(1, int(workers))
+        self.threads_per_worker = threads_per_worker
+        self.processes = []
+        self.core_slices = []
+        self.context = None
+        # Substitutos nascem de um pai já com threads (servidor, despacho, eventos):
+        # spawn evita herdar locks presos por essas threads
+        self.respawn_context = multiprocessing.get_context("spawn")
+        self.scheduler = None
+        # Cada worker tem sua fila de jobs: o daemon sabe qual job está com qual worker
+        self.job_queues = {}
+        self.idle_workers = []
+        # job entregue a um worker -> índice do worker (registrado no envio)
+        self.in_flight = {}
+        self.subscribers = {}
+        self.condition = threading.Condition()
+        self.job_ids = itertools.count(1)
+        self.server = None
+        self.stopping = False
+        self.toolchain = None
+
+    def start(self):
+        from service.whisper_service import configure_ffmpeg, preload_model
+        from service.model_cache_service import estimate_model_memory_mb
+        from service.toolchain_service import log_toolchain
+
+        # Detectado uma vez aqui; os workers herdam o resultado no fork
+        self.toolchain = log_toolchain()
+        if not configure_ffmpeg():
+            raise Exception("Falha na configuração do FFmpeg")
+        # O modelo é carregado antes do fork para ser compartilhado pelos workers
+        preload_model()
+
+        # Orçamento medido após o carregamento: o modelo compartilhado já está na RAM
+        self.scheduler = JobScheduler(
+            memory_budget_mb=get_setting("daemon", "memory_budget_mb", 0),
+            aging=get_setting("daemon", "scheduler_aging", 10.0),
+            model_memory_mb=estimate_model_memory_mb(get_setting("whisper", "model_size", "small")),
+            workers=self.workers,
+        )
+
+        # Cada worker recebe núcleos exclusivos (sem threads no pai antes do fork)
+        threads = self.threads_per_worker or max(1, len(plan_core_slices(1)[0]) // self.workers)
+        self.core_slices = plan_core_slices(self.workers, threads)
+        self.context = _get_context(allow_fork=True)
+        # Filas do contexto spawn: servem tanto aos workers do fork quanto aos substitutos
+        self.events = self.respawn_context.Queue()
+        self.processes = [self._spawn_worker(index, self.context) for index in range(self.workers)]
+        self.idle_workers = list(range(self.workers))
+
+        threading.Thread(target=self._dispatch, name="daemon-dispatch", daemon=True).start()
+        threading.Thread(target=self._route_events, name="daemon-events", daemon=True).start()
+        log(f"✓ Daemon iniciado com {self.workers} workers")
+        return self
+
+    def _spawn_worker(self, index, context):
+        # Fila nova: a anterior pode ter ficado inconsistente com a morte do worker
+        self.job_queues[index] = self.respawn_context.Queue()
+        process = context.Process(
+            target=_worker_main,
+            args=(index, self.core_slices[index % len(self.core_slices)], self.job_queues[index], self.events),
+            name=f"transcriber-worker-{index}",
+        )
+        # Não-daemônico: o worker pode criar o pool do motor parallel
+        process.daemon = False
+        process.start()
+        return process
+
+    def submit(self, video_path):
+        """Enfileira um job e retorna (id, fila de eventos)"""
+        from service.whisper_service import get_video_duration
+
+        # A duração (probe) ordena a fila; é obtida fora do lock
+        duration = get_video_duration(video_path) if os.path.isfile(video_path) else None
+        job_id = next(self.job_ids)
+        events = queue.Queue()
+        with self.condition:
+            self.subscribers[job_id] = events
+            self.scheduler.submit(job_id, video_path, duration)
+            self.condition.notify_all()
+        return job_id, events
+
+    def _dispatch(self):
+        while True:
+            with self.condition:
+                job = None
+                while not self.stopping:
+                    if self.idle_workers:
+                        job = self.scheduler.next_job()
+                        if job:
+                            break
+                    # Reavalia periodicamente: o envelhecimento muda a ordem da fila
+                    self.condition.wait(timeout=5)
+                if self.stopping:
+                    return
+                index = self.idle_workers.pop(0)
+                # Registrado antes do envio: se o worker morrer, o reaper encontra o job
+                self.in_flight[job["id"]] = index
+                jobs = self.job_queues[index]
+            jobs.put((job["id"], job["video_path"]))
+
+    def _route_events(self):
+        last_reap = time.monotonic()
+        while True:
+            try:
+                job_id, event = self.events.get(timeout=REAP_INTERVAL)
+            except queue.Empty:
+                event = None
+            except (EOFError, OSError):
+                return
+            # Eventos contínuos de outros workers não podem adiar a verificação
+            if time.monotonic() - last_reap >= REAP_INTERVAL:
+                self._reap_workers()
+                last_reap = time.monotonic()
+            if event is None:
+                continue
+
+            with self.condition:
+                if event["event"] == "done":
+                    # Ausente se o reaper já encerrou o job
+                    if self.in_flight.pop(job_id, None) is None:
+                        continue
+                    self.idle_workers.append(event["worker"])
+                    self.scheduler.finish(job_id)
+                    self.subscribers.pop(job_id, None)
+                    self.condition.notify_all()
+                    continue
+                subscriber = self.subscribers.get(job_id)
+            if subscriber:
+                subscriber.put(event)
+
+    def _reap_workers(self):
+        """Encerra os jobs entregues a workers que morreram e cria substitutos"""
+        for index, process in enumerate(self.processes):
+            if process.is_alive() or self.stopping:
+                continue
+            log(f"✗ Worker {index} terminou inesperadamente (código {process.exitcode}); recriando")
+            process.join(timeout=0)
+            # O substituto carrega o modelo do disco no primeiro job
+            replacement = self._spawn_worker(index, self.respawn_context)
+
+            with self.condition:
+                self.processes[index] = replacement
+                # Inclui o job ainda na fila do worker (morto antes de retirá-lo)
+                lost = [job_id for job_id, worker in self.in_flight.items() if worker == index]
+                subscribers = []
+                for job_id in lost:
+                    del self.in_flight[job_id]
+                    self.scheduler.finish(job_id)
+                    subscribers.append(self.subscribers.pop(job_id, None))
+                if index not in self.idle_workers:
+                    self.idle_workers.append(index)
+                self.condition.notify_all()
+            for subscriber in subscribers:
+                if subscriber:
+                    subscriber.put({"event": "error",
+                                    "message": f"Worker do daemon terminou inesperadamente (código {process.exitcode})"})
+
+    def status(self):
+        with self.condition:
+            return dict(self.scheduler.snapshot(), workers=self.workers, idle=len(self.idle_workers),
+                        toolchain=self.toolchain)
+
+    def job_status(self, job_id):
+        for job in self.status()["jobs"]:
+            if job["id"] == job_id:
+                return job
+        return None
+
+    def serve_forever(self, address=None):
+        address = address or get_daemon_address()
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def send(self, message):
+                self.wfile.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    self.send({"event": "error", "message": "Requisição inválida"})
+                    return
+
+                cmd = request.get("cmd")
+                if cmd == "ping":
+                    self.send({"event": "pong"})
+                elif cmd == "status":
+                    self.send(dict(daemon.status(), event="status"))
+                elif cmd == "process":
+                    job_id, events = daemon.submit(os.path.abspath(request["video_path"]))
+                    job = daemon.job_status(job_id) or {}
+                    self.send({"event": "queued", "job": job_id, "eta": job.get("eta"),
+                               "queue_depth": daemon.status()["queue_depth"]})
+                    while True:
+                        try:
+                            event = events.get(timeout=HEARTBEAT_INTERVAL)
+                        except queue.Empty:
+                            # Um cliente que sumiu faz o envio falhar e libera o handler
+                            event = {"event": "heartbeat", "job": job_id}
+                        try:
+                            self.send(event)
+                        except OSError:
+                            # Cliente desconectou; o job continua no worker
+                            return
+                        if event["event"] in FINAL_EVENTS:
+                            return
+                else:
+                    self.send({"event": "error", "message": f"Comando desconhecido: {cmd}"})
+
+        if isinstance(address, str):
+            os.makedirs(os.path.dirname(address) or ".", exist_ok=True)
+            if socket_in_use(address):
+                self.shutdown()
+                raise Exception(f"Já existe um daemon atendendo em {address}")
+            if os.path.exists(address):
+                log(f"♻ Removendo socket abandonado: {address}")
+                os.remove(address)
+            server_class = socketserver.ThreadingUnixStreamServer
+        else:
+            server_class = socketserver.ThreadingTCPServer
+            server_class.allow_reuse_address = True
+        server_class.daemon_threads = True
+
+        self.server = server_class(address, Handler)
+        log(f"✓ Aguardando jobs em {address}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.shutdown()
+            if isinstance(address, str) and os.path.exists(address):
+                os.remove(address)
+
+    def shutdown(self):
+        with self.condition:
+            if self.stopping:
+                return
+            self.stopping = True
+            self.condition.notify_all()
+        for jobs in self.job_queues.values():
+            jobs.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        if self.server:
+            self.server.server_close()
@@ -1,6 +1,16 @@
 import cv2
 import os
 import re
+import json
+from service.keyframe_index_service import load_keyframe_index
+from service.frame_hash_service import FrameDeduplicator
+from service.frame_writer_service import FrameWriter
+from service.config_service import get_setting
+from service.log_service import log
+
+# Sem índice de keyframes: distância (s) a partir da qual vale mais buscar (seek)
+# do que decodificar em sequência
+SEEK_GAP_SECONDS = 20
 
 def extract_timestamps_from_blog(blog_text):
     timestamps = []
@@ -9,20 +19,129 @@ def extract_timestamps_from_blog(blog_text):
         timestamps.append(float(match[0]))
     return timestamps
 
-def capture_frames_by_timestamps(video_path, timestamps, output_dir):
-    frames_dir = os.path.join(output_dir, "frames")
-    os.makedirs(frames_dir, exist_ok=True)
+def _position_seconds(cap, fps, frame_index):
+    """Tempo real do último quadro lido (PTS do stream; contagem de quadros como reserva)"""
+    position = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+    if position > 0 or frame_index == 0:
+        return position
+    return frame_index / fps
+
+def iter_frames_at(cap, timestamps, keyframes=None):
+    """Percorre o vídeo uma única vez e entrega (timestamp, quadro) para cada alvo
+
+    Os timestamps são ordenados; grab() avança sem converter o quadro e
+    retrieve() só é chamado nos quadros escolhidos. Cada alvo recebe o quadro
+    mais próximo do seu tempo, calculado pelo tempo real do stream (funciona
+    com 29.97 fps, ao contrário de int(fps)). Com `keyframes` (KeyframeIndex),
+    salta para o keyframe anterior ao alvo sempre que houver um keyframe no
+    intervalo, em vez de decodificá-lo.
+
+    Pode ser chamada várias vezes com o mesmo `cap` (lotes de timestamps): a
+    leitura continua da posição atual e volta atrás apenas para alvos já
+    ultrapassados.
+    """
+    targets = sorted(set(timestamps))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    half_frame = 0.5 / fps
+    frame_index = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    position = _position_seconds(cap, fps, frame_index) if frame_index > 0 else None
+    rewound_for = None
+    index = 0
+
+    while index < len(targets):
+        target = targets[index]
+        # Alvo distante: busca em vez de decodificar todo o intervalo
+        seek_to = None
+        if position is not None and target < position - half_frame and rewound_for != target:
+            # Alvo já ultrapassado: volta uma única vez para o keyframe anterior
+            keyframe = keyframes.keyframe_before(target - half_frame) if keyframes else None
+            seek_to = keyframe if keyframe is not None else max(0.0, target - 1.0)
+            rewound_for = target
+        elif keyframes:
+            if keyframes.keyframe_between(position or 0.0, target - half_frame):
+                seek_to = keyframes.keyframe_before(target - half_frame)
+        elif target - (position or 0.0) > SEEK_GAP_SECONDS:
+            seek_to = max(0.0, target - 1.0)
+        if seek_to is not None:
+            cap.set(cv2.CAP_PROP_POS_MSEC, seek_to * 1000)
+            frame_index = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+        if not cap.grab():
+            break
+        position = _position_seconds(cap, fps, frame_index)
+        frame_index += 1
+
+        if position + half_frame < target:
+            continue
+
+        ret, frame = cap.retrieve()
+        # Todos os alvos cobertos por este quadro recebem a mesma imagem
+        while index < len(targets) and targets[index] <= position + half_frame:
+            if ret:
+                yield targets[index], frame
+            index += 1
+
+def get_keyframe_index(video_path, output_dir, ffprobe_cmd="ffprobe"):
+    """Índice de keyframes salvo junto à saída do vídeo (None se indisponível)"""
+    try:
+        return load_keyframe_index(video_path, output_dir, ffprobe_cmd)
+    except Exception as e:
+        log(f"⚠ Índice de keyframes indisponível: {e}")
+        return None
+
+class FrameCaptureSession:
+    """Captura incremental: um único VideoCapture e pool de gravação para vários lotes
+
+    Timestamps já capturados são ignorados, então o mesmo alvo pode ser
+    enviado mais de uma vez.
+    """
+
+    def __init__(self, video_path, output_dir, keyframes=None):
+        self.frames_dir = os.path.join(output_dir, "frames")
+        os.makedirs(self.frames_dir, exist_ok=True)
+        if keyframes is None:
+            from service.whisper_service import get_ffprobe_cmd
+            keyframes = get_keyframe_index(video_path, output_dir, get_ffprobe_cmd())
+        self.keyframes = keyframes
+
+        self.dedup = None
+        if get_setting("frames", "dedup"):
+            self.dedup = FrameDeduplicator(get_setting("frames", "dedup_threshold", 6))
+        self.frame_names = {}
+        self.seen = set()
+
+        # A codificação roda no pool do FrameWriter, em paralelo com a decodificação
+        self.cap = cv2.VideoCapture(video_path)
+        self.writer = FrameWriter(self.frames_dir)
+
+    def capture(self, timestamps):
+        targets = [round(ts, 2) for ts in timestamps if round(ts, 2) not in self.seen]
+        self.seen.update(targets)
+        for timestamp, frame in iter_frames_at(self.cap, targets, self.keyframes):
+            if self.dedup and self.dedup.representative(frame, timestamp) is not None:
+                continue
+            self.frame_names[timestamp] = self.writer.submit(frame, timestamp)
 
-    cap = cv2.VideoCapture(video_path)
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    def close(self):
+        """Conclui as gravações, grava o manifest.json e retorna o diretório dos quadros"""
+        self.cap.release()
+        self.writer.close()
+        if self.dedup:
+            with open(os.path.join(self.frames_dir, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(self.dedup.manifest(self.frame_names), f, indent=2)
+            log(f"✓ {len(self.frame_names)} quadros gravados, {len(self.dedup.duplicates)} duplicados descartados")
+        return self.frames_dir
 
-    for timestamp in timestamps:
-        frame_number = int(timestamp * fps)
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-        ret, frame = cap.read()
-        if ret:
-            frame_path = os.path.join(frames_dir, f"frame_{timestamp:.2f}.jpg")
-            cv2.imwrite(frame_path, frame)
+def capture_frames_by_timestamps(video_path, timestamps, output_dir, keyframes=None):
+    """Grava um quadro por timestamp em output_dir/frames
 
-    cap.release()
-    return frames_dir
\ No newline at end of file
+    Com [frames] dedup ligado, quadros quase idênticos a um já gravado (dHash)
+    não são codificados; frames/manifest.json indica o quadro que representa
+    cada timestamp descartado.
+    """
+    session = FrameCaptureSession(video_path, output_dir, keyframes)
+    try:
+        session.capture(timestamps)
+    finally:
+        frames_dir = session.close()
+    return frames_dir
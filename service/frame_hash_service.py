@@ -0,0 +1,61 @@
+"""
+Hash perceptual (dHash) para descartar quadros quase idênticos
+
+Cada quadro é reduzido a 9x8 em tons de cinza e o hash de 64 bits registra se
+cada pixel é mais claro que o vizinho da direita. Quadros cujo hash difere em
+poucos bits (distância de Hamming) de um quadro já mantido são considerados
+duplicados; a comparação contra todos os mantidos é vetorizada em NumPy.
+"""
+
+import cv2
+import numpy as np
+
+HASH_SIZE = 8
+
+# Bits diferentes (de 64) abaixo dos quais dois quadros são considerados iguais
+DEFAULT_THRESHOLD = 6
+
+def dhash(frame, hash_size=HASH_SIZE):
+    """Hash de diferenças horizontais como inteiro sem sinal de 64 bits"""
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return np.packbits(bits.ravel()).view(">u8")[0].astype(np.uint64)
+
+def hamming_distances(hashes, value):
+    """Distância de Hamming de `value` para cada hash do array (vetorizado)"""
+    xor = np.bitwise_xor(hashes, np.uint64(value))
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+class FrameDeduplicator:
+    """Decide quais quadros gravar e registra quem representa os descartados"""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.hashes = np.zeros(0, dtype=np.uint64)
+        self.kept = []
+        self.duplicates = {}
+
+    def representative(self, frame, timestamp):
+        """Timestamp do quadro mantido equivalente, ou None se o quadro é novo (e passa a ser mantido)"""
+        value = dhash(frame)
+        if len(self.hashes):
+            distances = hamming_distances(self.hashes, value)
+            best = int(np.argmin(distances))
+            if distances[best] <= self.threshold:
+                self.duplicates[timestamp] = self.kept[best]
+                return self.kept[best]
+
+        self.hashes = np.append(self.hashes, np.uint64(value))
+        self.kept.append(timestamp)
+        return None
+
+    def manifest(self, frame_names):
+        """Mapa dos quadros gravados e de cada timestamp descartado para o seu representante"""
+        return {
+            "frames": {f"{ts:.2f}": frame_names[ts] for ts in self.kept if ts in frame_names},
+            "duplicates": {
+                f"{ts:.2f}": {"representative": f"{rep:.2f}", "frame": frame_names.get(rep)}
+                for ts, rep in self.duplicates.items()
+            },
+        }
@@ -0,0 +1,160 @@
+"""
+Estágio de captura de quadros em processo separado
+
+Roda ao lado da transcrição: cada trecho transcrito envia seus timestamps
+(início de cada segmento, ou a cada N segundos) para o processo de captura,
+que decodifica o vídeo enquanto o modelo ocupa a CPU com a inferência. No
+modo de cenas o processo analisa o vídeo inteiro por conta própria e só usa
+a transcrição final para associar cada quadro ao seu segmento.
+"""
+
+import time
+import queue
+import multiprocessing
+from service.log_service import log, set_log_callback
+
+# Intervalo (s) entre verificações do processo de captura enquanto aguarda o resultado
+RESULT_POLL_SECONDS = 1.0
+
+def _capture_main(video_path, output_dir, targets, results):
+    """Processo de captura: consome lotes de timestamps até receber None"""
+    from service.frame_capture_service import FrameCaptureSession
+
+    # O callback de log da interface pertence ao processo pai
+    set_log_callback(None)
+    summary = {"frames_dir": None, "error": None}
+    try:
+        session = FrameCaptureSession(video_path, output_dir)
+        try:
+            while True:
+                batch = targets.get()
+                if batch is None:
+                    break
+                session.capture(batch)
+        finally:
+            summary["frames_dir"] = session.close()
+            summary["frames"] = len(session.frame_names)
+            summary["duplicates"] = len(session.dedup.duplicates) if session.dedup else 0
+    except Exception as e:
+        summary["error"] = str(e)
+    results.put(summary)
+
+def _scene_main(video_path, output_dir, scene_options, targets, results):
+    """Processo de captura por cenas: analisa o vídeo e aguarda a transcrição para o índice"""
+    from service.scene_detect_service import capture_scene_frames, write_scene_index
+
+    set_log_callback(None)
+    summary = {"frames_dir": None, "error": None}
+    try:
+        frames_dir, scenes = capture_scene_frames(video_path, output_dir, **scene_options)
+        segments = []
+        while True:
+            batch = targets.get()
+            if batch is None:
+                break
+            segments = batch
+        write_scene_index(frames_dir, scenes, segments)
+        summary.update(frames_dir=frames_dir, frames=len(scenes), duplicates=0)
+    except Exception as e:
+        summary["error"] = str(e)
+    results.put(summary)
+
+class FrameCaptureStage:
+    """Envia timestamps ao processo de captura conforme a transcrição avança
+
+    `mode` é "segments" (um quadro no início de cada segmento), "interval"
+    (um quadro a cada `interval` segundos do áudio já transcrito) ou "scenes"
+    (quadros-chave por mudança de cena, com `scene_options` repassadas a
+    capture_scene_frames).
+    """
+
+    def __init__(self, video_path, output_dir, mode="segments", interval=30, scene_options=None):
+        self.mode = mode
+        self.interval = max(1.0, float(interval))
+        self.next_interval = 0.0
+        # spawn: o processo de captura não precisa herdar o modelo nem as threads do pai
+        ctx = multiprocessing.get_context("spawn")
+        self.targets = ctx.Queue()
+        self.results = ctx.Queue()
+        if mode == "scenes":
+            target = _scene_main
+            args = (video_path, output_dir, scene_options or {}, self.targets, self.results)
+        else:
+            target = _capture_main
+            args = (video_path, output_dir, self.targets, self.results)
+        self.process = ctx.Process(
+            target=target,
+            args=args,
+            name="frame-capture",
+            daemon=True,
+        )
+        self.process.start()
+
+    def _interval_targets(self, end):
+        timestamps = []
+        while self.next_interval < end:
+            timestamps.append(self.next_interval)
+            self.next_interval += self.interval
+        return timestamps
+
+    def add_chunk(self, start_offset, end_offset, parts):
+        """Callback de trecho concluído (mesma assinatura do chunk_callback)"""
+        if self.mode == "scenes":
+            # As cenas não dependem dos trechos; só a transcrição final é enviada
+            return
+        if self.mode == "interval":
+            timestamps = self._interval_targets(end_offset)
+        else:
+            timestamps = [seg["start"] for seg in parts]
+        if timestamps:
+            self.targets.put(timestamps)
+
+    def finish(self, transcription=None, timeout=None):
+        """Completa os alvos com a transcrição final e aguarda o processo
+
+        Trechos vindos do cache de resultados ou do checkpoint não passam pelo
+        callback; a transcrição final cobre esses alvos (duplicados são
+        ignorados pelo processo de captura). Retorna o diretório dos quadros.
+        """
+        if transcription:
+            if self.mode == "scenes":
+                self.targets.put([{"start": seg["start"], "end": seg["end"], "text": seg["text"]}
+                                  for seg in transcription])
+            elif self.mode == "interval":
+                self.add_chunk(0, transcription[-1]["end"], [])
+            else:
+                self.add_chunk(0, 0, transcription)
+        self.targets.put(None)
+
+        summary = None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while summary is None:
+            try:
+                summary = self.results.get(timeout=RESULT_POLL_SECONDS)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    # O resultado pode ter sido enviado pouco antes de o processo sair
+                    try:
+                        summary = self.results.get(timeout=RESULT_POLL_SECONDS)
+                    except queue.Empty:
+                        log(f"✗ Processo de captura de quadros terminou sem resultado (código {self.process.exitcode})")
+                        break
+                elif deadline is not None and time.monotonic() >= deadline:
+                    log("⚠ Captura de quadros não respondeu")
+                    break
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+
+        if not summary:
+            return None
+        if summary["error"]:
+            log(f"✗ Erro na captura de quadros: {summary['error']}")
+            return None
+        log(f"✓ Quadros capturados: {summary['frames']} gravados, {summary['duplicates']} duplicados descartados")
+        return summary["frames_dir"]
+
+    def abort(self):
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join(timeout=5)
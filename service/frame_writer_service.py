@@ -0,0 +1,87 @@
+"""
+Gravação de quadros em um pool de threads
+
+Redimensionar e codificar (JPEG/WebP) são feitos pelo OpenCV, que libera o
+GIL; assim o laço de decodificação entrega o quadro e segue adiante enquanto
+as threads codificam. Um semáforo limita os quadros pendentes (memória
+limitada ao tamanho da fila) e cada arquivo é gravado de forma atômica.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from service.config_service import get_setting
+from service.hardware_service import get_cpu_limit
+
+FORMATS = {
+    "jpg": lambda quality: [cv2.IMWRITE_JPEG_QUALITY, quality],
+    "webp": lambda quality: [cv2.IMWRITE_WEBP_QUALITY, quality],
+}
+
+class FrameWriter:
+    """Pool limitado que redimensiona, codifica e grava quadros"""
+
+    def __init__(self, frames_dir, image_format=None, quality=None, width=None, threads=None, queue_size=None):
+        self.frames_dir = frames_dir
+        self.format = (image_format or get_setting("frames", "image_format", "jpg")).lower().lstrip(".")
+        if self.format == "jpeg":
+            self.format = "jpg"
+        if self.format not in FORMATS:
+            raise Exception(f"Formato de imagem não suportado: {self.format}")
+        quality = quality or get_setting("frames", "image_quality", 90)
+        self.params = FORMATS[self.format](quality)
+        self.width = width if width is not None else get_setting("frames", "image_width", 0)
+
+        threads = threads or get_setting("frames", "writer_threads", 0) or min(4, get_cpu_limit())
+        queue_size = queue_size or get_setting("frames", "writer_queue_size", 8)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="frame-writer")
+        self.slots = threading.BoundedSemaphore(max(1, queue_size))
+        self.futures = []
+        os.makedirs(frames_dir, exist_ok=True)
+
+    def filename(self, timestamp):
+        return f"frame_{timestamp:.2f}.{self.format}"
+
+    def submit(self, frame, timestamp):
+        """Enfileira o quadro (bloqueia se a fila estiver cheia) e retorna o nome do arquivo"""
+        name = self.filename(timestamp)
+        self.slots.acquire()
+        try:
+            self.futures.append(self.executor.submit(self._write, frame, os.path.join(self.frames_dir, name)))
+        except Exception:
+            self.slots.release()
+            raise
+        return name
+
+    def _write(self, frame, path):
+        try:
+            if self.width and frame.shape[1] > self.width:
+                height = int(frame.shape[0] * self.width / frame.shape[1])
+                frame = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+            ok, data = cv2.imencode(f".{self.format}", frame, self.params)
+            if not ok:
+                raise Exception(f"Falha ao codificar {path}")
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data.tobytes())
+            os.replace(temp_path, path)
+        finally:
+            self.slots.release()
+
+    def close(self):
+        """Aguarda as gravações pendentes; repassa o primeiro erro"""
+        self.executor.shutdown(wait=True)
+        futures, self.futures = self.futures, []
+        for future in futures:
+            future.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.executor.shutdown(wait=True)
+            return False
+        self.close()
+        return False
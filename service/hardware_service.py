@@ -0,0 +1,130 @@
+"""
+Informações de hardware usadas para dimensionar caches e lotes
+"""
+
+import os
+import platform
+
+def _read_meminfo():
+    """Lê /proc/meminfo (Linux) em MB"""
+    values = {}
+    with open("/proc/meminfo", encoding="utf-8") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            parts = rest.split()
+            if parts:
+                values[key] = int(parts[0]) / 1024
+    return values
+
+def _windows_memory_status():
+    import ctypes
+
+    class MEMORYSTATUSEX(ctypes.Structure):
+        _fields_ = [
+            ("dwLength", ctypes.c_ulong),
+            ("dwMemoryLoad", ctypes.c_ulong),
+            ("ullTotalPhys", ctypes.c_ulonglong),
+            ("ullAvailPhys", ctypes.c_ulonglong),
+            ("ullTotalPageFile", ctypes.c_ulonglong),
+            ("ullAvailPageFile", ctypes.c_ulonglong),
+            ("ullTotalVirtual", ctypes.c_ulonglong),
+            ("ullAvailVirtual", ctypes.c_ulonglong),
+            ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+        ]
+
+    status = MEMORYSTATUSEX()
+    status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+    ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+    return status
+
+def get_total_memory_mb():
+    """Memória física total em MB (None se não for possível detectar)"""
+    try:
+        if platform.system() == "Windows":
+            return _windows_memory_status().ullTotalPhys / 1024**2
+        if os.path.exists("/proc/meminfo"):
+            return _read_meminfo()["MemTotal"]
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024**2
+    except Exception:
+        return None
+
+def get_available_memory_mb():
+    """Memória física disponível em MB (None se não for possível detectar)"""
+    try:
+        if platform.system() == "Windows":
+            return _windows_memory_status().ullAvailPhys / 1024**2
+        if os.path.exists("/proc/meminfo"):
+            meminfo = _read_meminfo()
+            return meminfo.get("MemAvailable", meminfo.get("MemFree"))
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES") / 1024**2
+    except Exception:
+        return None
+
+def _read_first_line(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+def get_cgroup_cpu_quota():
+    """Limite de CPUs imposto pelo cgroup (contêineres), ou None se não houver"""
+    # cgroup v2: "<quota> <período>" ou "max <período>"
+    try:
+        line = _read_first_line("/sys/fs/cgroup/cpu.max")
+        if line:
+            quota, _, period = line.partition(" ")
+            if quota != "max" and period:
+                return int(quota) / int(period)
+            return None
+
+        # cgroup v1: quota -1 significa sem limite
+        quota = _read_first_line("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        period = _read_first_line("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if quota and period and int(quota) > 0:
+            return int(quota) / int(period)
+    except (ValueError, ZeroDivisionError):
+        pass
+    return None
+
+def get_cpu_limit():
+    """Núcleos efetivamente utilizáveis: afinidade do processo e quota do cgroup"""
+    try:
+        available = len(os.sched_getaffinity(0))
+    except AttributeError:
+        available = os.cpu_count() or 1
+    quota = get_cgroup_cpu_quota()
+    if quota:
+        # Uma quota de 1.5 CPU ainda ocupa dois núcleos em paralelo
+        available = min(available, max(1, int(quota + 0.999)))
+    return available
+
+def get_cpu_features():
+    """Extensões vetoriais da CPU relevantes para a inferência (None se desconhecido)"""
+    flags = None
+    try:
+        if os.path.exists("/proc/cpuinfo"):
+            with open("/proc/cpuinfo", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith(("flags", "Features")):
+                        flags = set(line.partition(":")[2].split())
+                        break
+    except OSError:
+        pass
+    if flags is None:
+        return {"avx2": None, "avx512": None, "amx": None}
+    return {
+        "avx2": "avx2" in flags,
+        "avx512": "avx512f" in flags,
+        "amx": "amx_tile" in flags,
+    }
+
+def get_cpu_info():
+    """Resumo da CPU: núcleos lógicos, núcleos utilizáveis e extensões"""
+    return {
+        "model": platform.processor() or platform.machine(),
+        "logical_cores": os.cpu_count() or 1,
+        "usable_cores": get_cpu_limit(),
+        "cgroup_quota": get_cgroup_cpu_quota(),
+        "features": get_cpu_features(),
+    }
@@ -0,0 +1,86 @@
+"""
+Índice persistente de keyframes por vídeo
+
+Uma varredura de pacotes (ffprobe, sem decodificar) registra o PTS de cada
+keyframe do stream de vídeo. O índice é gravado ao lado da saída do vídeo e
+reaproveitado enquanto tamanho e mtime do arquivo não mudam; a captura de
+quadros o usa para saltar direto ao keyframe anterior a cada alvo e decodificar
+só o necessário.
+"""
+
+import os
+import json
+import bisect
+import subprocess
+
+INDEX_FILE = "keyframes.json"
+
+class KeyframeIndex:
+    """PTS (s) dos keyframes, em ordem"""
+
+    def __init__(self, times):
+        self.times = times
+
+    def __len__(self):
+        return len(self.times)
+
+    def keyframe_before(self, timestamp):
+        """PTS do último keyframe em ou antes de `timestamp` (None se não houver)"""
+        i = bisect.bisect_right(self.times, timestamp) - 1
+        if i < 0:
+            return None
+        return self.times[i]
+
+    def keyframe_between(self, start, end):
+        """Há keyframe em (start, end]? Nesse caso buscar é melhor que decodificar o intervalo"""
+        i = bisect.bisect_right(self.times, start)
+        return i < len(self.times) and self.times[i] <= end
+
+def scan_keyframes(video_path, ffprobe_cmd="ffprobe", timeout=600):
+    """Varre os pacotes do primeiro stream de vídeo e retorna os PTS dos keyframes, em ordem"""
+    result = subprocess.run(
+        [ffprobe_cmd, "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path],
+        capture_output=True, text=True, timeout=timeout,
+    )
+    if result.returncode != 0:
+        raise Exception(f"Falha ao indexar keyframes: {result.stderr.strip()}")
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        fields = line.strip().split(",")
+        if len(fields) < 2 or "K" not in fields[1]:
+            continue
+        try:
+            keyframes.append(float(fields[0]))
+        except ValueError:
+            continue
+    keyframes.sort()
+    return keyframes
+
+def load_keyframe_index(video_path, index_dir, ffprobe_cmd="ffprobe"):
+    """Carrega o índice salvo em `index_dir` ou o constrói (uma única vez)"""
+    stat = os.stat(video_path)
+    index_path = os.path.join(index_dir, INDEX_FILE)
+
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data["size"] == stat.st_size and data["mtime"] == stat.st_mtime:
+            return KeyframeIndex(data["times"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    times = scan_keyframes(video_path, ffprobe_cmd)
+
+    os.makedirs(index_dir, exist_ok=True)
+    temp_path = f"{index_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "video": os.path.abspath(video_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "times": times,
+        }, f)
+    os.replace(temp_path, index_path)
+    return KeyframeIndex(times)
@@ -0,0 +1,17 @@
+"""
+Log compartilhado pelos serviços, capturável pela interface
+"""
+
+# Variável global para callback de log
+_log_callback = None
+
+def set_log_callback(callback):
+    """Define callback para logs"""
+    global _log_callback
+    _log_callback = callback
+
+def log(message):
+    """Log que pode ser capturado pela interface"""
+    print(message)
+    if _log_callback:
+        _log_callback(message)
@@ -0,0 +1,181 @@
+"""
+Probe de mídia único e memoizado
+
+Um único ffprobe por arquivo produz um MediaInfo (streams, duração do
+container, codecs e dicas para busca por keyframe). O resultado fica em
+memória e em um índice SQLite persistente, indexado por (caminho, tamanho,
+mtime): execuções repetidas e varreduras de bibliotecas grandes não repetem o
+probe de arquivos inalterados.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from contextlib import closing
+from service.config_service import get_setting
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    probe TEXT NOT NULL
+)
+"""
+
+# path -> MediaInfo (válido enquanto tamanho e mtime não mudarem)
+_memo = {}
+_lock = threading.Lock()
+
+def _parse_rate(rate):
+    """Converte '30000/1001' em float (None se indefinido)"""
+    try:
+        num, _, den = str(rate).partition("/")
+        value = float(num) / float(den or 1)
+        return value if value > 0 else None
+    except (ValueError, ZeroDivisionError):
+        return None
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class MediaInfo:
+    """Resultado de um ffprobe: streams, formato e metadados derivados"""
+
+    def __init__(self, path, size, mtime, probe):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.probe = probe
+        self.streams = probe.get("streams", [])
+        self.format = probe.get("format", {})
+
+    @property
+    def video_streams(self):
+        return [s for s in self.streams if s.get("codec_type") == "video"]
+
+    @property
+    def audio_streams(self):
+        return [s for s in self.streams if s.get("codec_type") == "audio"]
+
+    @property
+    def video(self):
+        streams = self.video_streams
+        return streams[0] if streams else None
+
+    @property
+    def audio(self):
+        streams = self.audio_streams
+        return streams[0] if streams else None
+
+    @property
+    def duration(self):
+        """Duração do container; na falta dela, a maior duração entre os streams"""
+        duration = _to_float(self.format.get("duration"))
+        if duration:
+            return duration
+        durations = [_to_float(s.get("duration")) for s in self.streams]
+        durations = [d for d in durations if d]
+        return max(durations) if durations else None
+
+    @property
+    def video_codec(self):
+        return self.video.get("codec_name") if self.video else None
+
+    @property
+    def audio_codec(self):
+        return self.audio.get("codec_name") if self.audio else None
+
+    @property
+    def fps(self):
+        """Taxa de quadros real (ex.: 29.97), não truncada"""
+        if not self.video:
+            return None
+        return _parse_rate(self.video.get("avg_frame_rate")) or _parse_rate(self.video.get("r_frame_rate"))
+
+    @property
+    def keyframe_hints(self):
+        """Informações do stream de vídeo usadas para busca por keyframe"""
+        if not self.video:
+            return {}
+        return {
+            "time_base": self.video.get("time_base"),
+            "start_time": _to_float(self.video.get("start_time")) or 0.0,
+            "fps": self.fps,
+            "has_b_frames": int(self.video.get("has_b_frames", 0) or 0),
+            "nb_frames": int(self.video["nb_frames"]) if str(self.video.get("nb_frames", "")).isdigit() else None,
+        }
+
+    def to_dict(self):
+        return {
+            "path": self.path,
+            "size": self.size,
+            "duration": self.duration,
+            "video_codec": self.video_codec,
+            "audio_codec": self.audio_codec,
+            "keyframe_hints": self.keyframe_hints,
+        }
+
+def get_index_path():
+    return get_setting("cache", "media_index", os.path.join("cache", "media_index.sqlite"))
+
+def _connect():
+    path = get_index_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    connection = sqlite3.connect(path, timeout=10)
+    try:
+        connection.execute(SCHEMA)
+    except sqlite3.Error:
+        connection.close()
+        raise
+    return connection
+
+def _index_lookup(path, size, mtime):
+    try:
+        with closing(_connect()) as connection:
+            row = connection.execute(
+                "SELECT probe FROM media WHERE path = ? AND size = ? AND mtime = ?",
+                (path, size, mtime),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    except (sqlite3.Error, ValueError):
+        return None
+
+def _index_store(path, size, mtime, probe):
+    try:
+        # closing fecha a conexão; o segundo `with` faz o commit da transação
+        with closing(_connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO media (path, size, mtime, probe) VALUES (?, ?, ?, ?)",
+                (path, size, mtime, json.dumps(probe)),
+            )
+    except sqlite3.Error:
+        pass
+
+def probe_media(video_path, runner):
+    """Retorna o MediaInfo do arquivo, executando `runner(path)` (ffprobe) só se necessário
+
+    Exceções do `runner` são propagadas (arquivo ilegível não é indexado).
+    """
+    path = os.path.abspath(video_path)
+    stat = os.stat(path)
+    size, mtime = stat.st_size, stat.st_mtime
+
+    with _lock:
+        info = _memo.get(path)
+    if info and info.size == size and info.mtime == mtime:
+        return info
+
+    probe = _index_lookup(path, size, mtime)
+    if probe is None:
+        probe = runner(video_path)
+        _index_store(path, size, mtime, probe)
+
+    info = MediaInfo(path, size, mtime, probe)
+    with _lock:
+        _memo[path] = info
+    return info
@@ -0,0 +1,133 @@
+"""
+Cache de modelos Whisper residentes no processo
+
+Os modelos ficam carregados entre vídeos, indexados por (tamanho, dispositivo),
+com despejo LRU quando o orçamento de memória é excedido. A precisão não faz
+parte da chave: fp16 e fp32 usam os mesmos pesos, e o fp16 é aplicado na
+decodificação (opção fp16 do model.transcribe).
+whisper e torch só são importados quando um modelo é carregado ou liberado.
+"""
+
+import gc
+import threading
+from collections import OrderedDict
+from service.config_service import get_setting
+from service.hardware_service import get_total_memory_mb, get_cpu_limit
+from service.log_service import log
+
+# Estimativa de memória dos pesos em fp32 (MB), usada antes do carregamento
+MODEL_MEMORY_ESTIMATE_MB = {
+    "tiny": 150,
+    "base": 290,
+    "small": 970,
+    "medium": 3060,
+    "large": 6170,
+}
+
+# (tamanho, dispositivo) -> {"model": ..., "memory_mb": ...}
+_models = OrderedDict()
+_lock = threading.RLock()
+
+def resolve_precision(device, precision=None):
+    """Define a precisão efetiva: fp16 só é suportado em GPU"""
+    if precision in (None, "", "auto"):
+        precision = get_setting("performance", "model_precision", "auto")
+    if precision in (None, "", "auto"):
+        return "fp16" if device == "cuda" else "fp32"
+    if precision == "fp16" and device != "cuda":
+        log("⚠ fp16 não é suportado em CPU, usando fp32")
+        return "fp32"
+    return precision
+
+def get_memory_budget_mb():
+    """Orçamento de memória do cache (0 no config = metade da RAM física)"""
+    budget = get_setting("performance", "model_cache_budget_mb", 0)
+    if budget and budget > 0:
+        return budget
+    total = get_total_memory_mb()
+    return total / 2 if total else None
+
+def _model_memory_mb(model):
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors) / 1024**2
+
+def estimate_model_memory_mb(size):
+    base_name = size.split(".")[0].split("-")[0]
+    return MODEL_MEMORY_ESTIMATE_MB.get(base_name, MODEL_MEMORY_ESTIMATE_MB["large"])
+
+def _cached_memory_mb():
+    return sum(entry["memory_mb"] for entry in _models.values())
+
+def _evict_for(required_mb):
+    """Despeja modelos menos usados até caber `required_mb` no orçamento"""
+    budget = get_memory_budget_mb()
+    if not budget:
+        return
+    while _models and _cached_memory_mb() + required_mb > budget:
+        key, entry = _models.popitem(last=False)
+        log(f"♻ Removendo do cache modelo {key[0]} ({key[1]}) - {entry['memory_mb']:.0f} MB")
+        _release(entry)
+
+def _release(entry):
+    entry["model"] = None
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except Exception:
+        pass
+
+def get_model(size="small", device="cpu"):
+    """Retorna o modelo do cache, carregando-o se necessário"""
+    key = (size, device)
+
+    with _lock:
+        entry = _models.get(key)
+        if entry is not None:
+            _models.move_to_end(key)
+            log(f"✓ Modelo {size} ({device}) reaproveitado do cache")
+            return entry["model"]
+
+        _evict_for(estimate_model_memory_mb(size))
+
+        import whisper
+        import torch
+
+        # O torch usa todos os núcleos da máquina, mesmo com quota de CPU no contêiner
+        limit = get_cpu_limit()
+        if torch.get_num_threads() > limit:
+            torch.set_num_threads(limit)
+
+        log(f"Carregando modelo Whisper {size} ({device})...")
+        model = whisper.load_model(size, device=device)
+        model.eval()
+        memory_mb = _model_memory_mb(model)
+        _models[key] = {"model": model, "memory_mb": memory_mb}
+        log(f"✓ Modelo carregado ({memory_mb:.0f} MB, {len(_models)} em cache)")
+        return model
+
+def is_model_cached(size="small", device="cpu"):
+    with _lock:
+        return (size, device) in _models
+
+def unload(size=None, device=None):
+    """Remove modelos do cache; sem argumentos remove todos"""
+    with _lock:
+        for key in list(_models.keys()):
+            if size is not None and key[0] != size:
+                continue
+            if device is not None and key[1] != device:
+                continue
+            entry = _models.pop(key)
+            log(f"Modelo {key[0]} ({key[1]}) removido da memória")
+            _release(entry)
+
+def get_cache_stats():
+    """Resumo do cache: modelos residentes, memória usada e orçamento"""
+    with _lock:
+        return {
+            "models": [list(key) for key in _models.keys()],
+            "memory_mb": _cached_memory_mb(),
+            "budget_mb": get_memory_budget_mb(),
+        }
@@ -0,0 +1,137 @@
+"""
+Transcrição paralela: distribui os segmentos entre um pool de processos, cada
+um com uma fatia exclusiva de núcleos da CPU (torch.set_num_threads + afinidade).
+
+- Os workers são criados por spawn e cada um carrega o modelo do disco: o pai
+  já tem threads (interface, pipeline) e já inicializou o torch, e um fork
+  nessas condições pode herdar locks presos e travar.
+- O áudio não é serializado: cada worker abre o mesmo buffer PCM mapeado em
+  memória (page cache compartilhado) e recebe apenas o intervalo de amostras.
+"""
+
+import os
+import threading
+import multiprocessing
+import numpy as np
+from service.log_service import log, set_log_callback
+from service.hardware_service import get_cpu_limit
+from service.model_cache_service import get_model
+
+# Estado de cada processo worker
+_worker_model = None
+_worker_options = None
+
+def get_cpu_cores():
+    """Núcleos que este processo pode usar (respeita a afinidade e a quota do cgroup)"""
+    try:
+        cores = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = list(range(os.cpu_count() or 1))
+    return cores[:get_cpu_limit()]
+
+def plan_core_slices(workers=0, threads_per_worker=4):
+    """Divide os núcleos disponíveis em fatias disjuntas, uma por worker"""
+    cores = get_cpu_cores()
+    threads_per_worker = max(1, min(threads_per_worker, len(cores)))
+    if not workers or workers <= 0:
+        workers = max(1, len(cores) // threads_per_worker)
+    workers = max(1, min(workers, len(cores)))
+    threads = len(cores) // workers
+    return [cores[i * threads:(i + 1) * threads] for i in range(workers)]
+
+def _get_context(allow_fork=False):
+    """Contexto dos processos worker
+
+    fork (pesos compartilhados copy-on-write) só com `allow_fork` e um pai de
+    thread única, que é o caso da inicialização do daemon; fora disso, spawn.
+    """
+    if (allow_fork and threading.active_count() == 1
+            and "fork" in multiprocessing.get_all_start_methods()):
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+def _init_worker(core_slices, counter, model_key, decode_options):
+    global _worker_model, _worker_options
+
+    # O callback de log da interface pertence ao processo pai
+    set_log_callback(None)
+
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    cores = core_slices[index % len(core_slices)]
+
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError:
+            pass
+    import torch
+    torch.set_num_threads(len(cores))
+
+    _worker_model = get_model(*model_key)
+    _worker_options = decode_options
+
+def _transcribe_task(task):
+    buffer_file, start_sample, end_sample, start_offset = task
+    try:
+        audio = np.memmap(buffer_file, dtype=np.float32, mode='c')[start_sample:end_sample]
+        result = _worker_model.transcribe(audio, **_worker_options)
+        segments = [
+            {
+                "start": seg["start"] + start_offset,
+                "end": seg["end"] + start_offset,
+                "text": seg["text"],
+            }
+            for seg in result["segments"]
+        ]
+        return start_offset, segments, None
+    except Exception as e:
+        return start_offset, [], str(e)
+
+def transcribe_segments_parallel(model_key, segments, progress_callback=None, decode_options=None,
+                                 workers=0, threads_per_worker=4, chunk_callback=None):
+    """Transcreve segmentos do buffer mapeado em memória usando um pool de processos
+
+    `model_key` é a tupla (tamanho, dispositivo) do cache de modelos; a precisão
+    vem em `decode_options`.
+    Os resultados são reunidos em ordem de timestamp. `chunk_callback(start_offset,
+    end_offset, partes)` é chamado no processo pai a cada segmento concluído.
+    """
+    tasks = []
+    end_offsets = {}
+    for seg in segments:
+        tasks.append((seg['buffer_file'], seg['start_sample'], seg['end_sample'], seg['start_offset']))
+        end_offsets[seg['start_offset']] = seg['end_offset']
+    if not tasks:
+        return []
+
+    core_slices = plan_core_slices(workers, threads_per_worker)
+    core_slices = core_slices[:len(tasks)]
+    log(f"Modo paralelo: {len(core_slices)} processos x {len(core_slices[0])} threads")
+
+    ctx = _get_context()
+    counter = ctx.Value('i', 0)
+    results = []
+    completed = 0
+
+    with ctx.Pool(
+        processes=len(core_slices),
+        initializer=_init_worker,
+        initargs=(core_slices, counter, model_key, decode_options or {}),
+    ) as pool:
+        for start_offset, parts, error in pool.imap_unordered(_transcribe_task, tasks):
+            completed += 1
+            if error:
+                log(f"✗ Erro ao transcrever segmento {start_offset:.2f}s: {error}")
+            else:
+                log(f"✓ Segmento {start_offset:.2f}s transcrito com {len(parts)} partes ({completed}/{len(tasks)})")
+                results.extend(parts)
+                if chunk_callback:
+                    chunk_callback(start_offset, end_offsets[start_offset], parts)
+
+            if progress_callback:
+                progress_callback(min(99, int((completed / len(tasks)) * 100)))
+
+    results.sort(key=lambda seg: seg["start"])
+    return results
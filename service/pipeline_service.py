@@ -0,0 +1,164 @@
+"""
+Pipeline produtor/consumidor em estágios: cada estágio roda em sua própria
+thread, ligado ao seguinte por uma fila limitada (backpressure).
+
+Permite preparar o trecho N+1 enquanto o modelo transcreve o trecho N, e mede a
+utilização de cada estágio para apontar qual deles é o gargalo. Estágios que
+rodam em threads de outros módulos (ex.: a leitora do FFmpeg) entram no
+relatório por observe().
+"""
+
+import queue
+import threading
+import time
+from service.trace_service import span
+
+_ITEM = "item"
+_END = "end"
+_ERROR = "error"
+
+class StageStats:
+    """Contadores de utilização de um estágio"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0            # tempo produzindo/processando itens
+        self.waiting_input = 0.0   # tempo parado aguardando o estágio anterior
+        self.waiting_output = 0.0  # tempo parado com a fila seguinte cheia
+        self.started = None
+        self.finished = None
+
+    @property
+    def wall(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def utilisation(self):
+        return self.busy / self.wall if self.wall > 0 else 0.0
+
+    def summary(self):
+        return (
+            f"{self.name}: {self.items} itens, {self.busy:.1f}s ocupado "
+            f"({self.utilisation:.0%}), aguardando entrada {self.waiting_input:.1f}s, "
+            f"aguardando saída {self.waiting_output:.1f}s"
+        )
+
+class Pipeline:
+    """Encadeia estágios em threads e coleta suas estatísticas"""
+
+    def __init__(self, queue_size=2):
+        self.queue_size = max(1, int(queue_size))
+        self.stages = []
+
+    def observe(self, name):
+        """Registra e retorna os contadores de um estágio com thread própria externa
+
+        Quem roda o estágio preenche started/finished, items, busy e waiting_*.
+        """
+        stats = StageStats(name)
+        self.stages.append(stats)
+        return stats
+
+    def stage(self, source, name, transform=None):
+        """Itera `source` (aplicando `transform`) em uma thread própria
+
+        Retorna um gerador que entrega os itens produzidos, na ordem.
+        """
+        stats = StageStats(name)
+        self.stages.append(stats)
+        items = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+
+        def put(message):
+            # Bloqueia enquanto a fila estiver cheia, mas respeita o cancelamento
+            while not stop.is_set():
+                try:
+                    items.put(message, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def worker():
+            stats.started = time.perf_counter()
+            try:
+                iterator = iter(source)
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    with span("pipeline_stage", stage=name) as trace:
+                        try:
+                            item = next(iterator)
+                        except StopIteration:
+                            trace.set(end=True)
+                            break
+                        if transform:
+                            item = transform(item)
+                    stats.busy += time.perf_counter() - started
+                    stats.items += 1
+
+                    started = time.perf_counter()
+                    if not put((_ITEM, item)):
+                        return
+                    stats.waiting_output += time.perf_counter() - started
+                put((_END, None))
+            except Exception as e:
+                put((_ERROR, e))
+            finally:
+                stats.finished = time.perf_counter()
+
+        thread = threading.Thread(target=worker, name=f"pipeline-{name}", daemon=True)
+        thread.start()
+
+        def iterate():
+            try:
+                while True:
+                    kind, item = items.get()
+                    if kind == _END:
+                        return
+                    if kind == _ERROR:
+                        raise item
+                    yield item
+            finally:
+                stop.set()
+                thread.join(timeout=5)
+
+        return iterate()
+
+    def consume(self, source, name):
+        """Mede o estágio final (quem consome os itens no thread atual)"""
+        stats = StageStats(name)
+        self.stages.append(stats)
+        stats.started = time.perf_counter()
+        try:
+            iterator = iter(source)
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                stats.waiting_input += time.perf_counter() - started
+
+                started = time.perf_counter()
+                yield item
+                stats.busy += time.perf_counter() - started
+                stats.items += 1
+        finally:
+            stats.finished = time.perf_counter()
+
+    def bottleneck(self):
+        """Estágio com maior utilização"""
+        if not self.stages:
+            return None
+        return max(self.stages, key=lambda stats: stats.utilisation)
+
+    def report(self):
+        """Linhas de resumo por estágio, terminando com o gargalo"""
+        lines = [stats.summary() for stats in self.stages]
+        slowest = self.bottleneck()
+        if slowest:
+            lines.append(f"Gargalo: {slowest.name} ({slowest.utilisation:.0%} ocupado)")
+        return lines
@@ -0,0 +1,149 @@
+"""
+Cache de transcrições endereçado por conteúdo
+
+A chave combina uma impressão digital rápida do arquivo (tamanho + hash de
+blocos amostrados, sem ler o vídeo inteiro) com modelo, idioma e opções de
+decodificação. Entradas são JSON em disco com despejo LRU por tamanho total.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from service.config_service import get_setting
+
+# Blocos amostrados para a impressão digital
+FINGERPRINT_SAMPLES = 16
+FINGERPRINT_BLOCK_SIZE = 64 * 1024
+
+STATS_FILE = "stats.json"
+
+_lock = threading.Lock()
+
+def file_fingerprint(path):
+    """Hash de blocos espaçados uniformemente (início e fim incluídos) + tamanho"""
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(str(size).encode())
+
+    with open(path, "rb") as f:
+        if size <= FINGERPRINT_SAMPLES * FINGERPRINT_BLOCK_SIZE:
+            digest.update(f.read())
+        else:
+            last_offset = size - FINGERPRINT_BLOCK_SIZE
+            for i in range(FINGERPRINT_SAMPLES):
+                f.seek(last_offset * i // (FINGERPRINT_SAMPLES - 1))
+                digest.update(f.read(FINGERPRINT_BLOCK_SIZE))
+
+    return digest.hexdigest()
+
+def make_cache_key(video_path, options):
+    """Chave do cache: impressão digital do arquivo + opções que afetam o resultado"""
+    payload = json.dumps(
+        {"fingerprint": file_fingerprint(video_path), "options": options},
+        sort_keys=True,
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+def get_cache_dir():
+    cache_dir = get_setting("cache", "result_cache_dir", os.path.join("cache", "transcriptions"))
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+def _entry_path(key):
+    return os.path.join(get_cache_dir(), f"{key}.json")
+
+def _load_stats():
+    try:
+        with open(os.path.join(get_cache_dir(), STATS_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"hits": 0, "misses": 0, "evictions": 0}
+
+def _save_stats(stats):
+    _atomic_write_json(os.path.join(get_cache_dir(), STATS_FILE), stats)
+
+def _count(field, amount=1):
+    stats = _load_stats()
+    stats[field] = stats.get(field, 0) + amount
+    _save_stats(stats)
+
+def _atomic_write_json(path, data):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+def get_cached_transcription(key):
+    """Retorna os segmentos armazenados ou None"""
+    path = _entry_path(key)
+    with _lock:
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            _count("misses")
+            return None
+
+        # Atualiza o horário de acesso usado pelo LRU
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        _count("hits")
+        return entry["segments"]
+
+def store_transcription(key, segments, metadata=None):
+    """Grava a transcrição e aplica o limite de tamanho do cache"""
+    with _lock:
+        _atomic_write_json(_entry_path(key), {
+            "segments": segments,
+            "metadata": metadata or {},
+            "created": time.time(),
+        })
+        _evict()
+
+def _entries():
+    cache_dir = get_cache_dir()
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".json") or name == STATS_FILE:
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+def _evict():
+    max_bytes = get_setting("cache", "result_cache_max_mb", 500) * 1024 * 1024
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+
+    while entries and total > max_bytes:
+        _, size, path = entries.pop(0)
+        try:
+            os.remove(path)
+            total -= size
+            evicted += 1
+        except OSError:
+            pass
+
+    if evicted:
+        _count("evictions", evicted)
+
+def get_cache_stats():
+    """Acertos, faltas, despejos, entradas e tamanho atual do cache"""
+    with _lock:
+        stats = _load_stats()
+        entries = _entries()
+        stats["entries"] = len(entries)
+        stats["size_mb"] = sum(size for _, size, _ in entries) / 1024**2
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        stats["hit_rate"] = stats.get("hits", 0) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,154 @@
+"""
+Quadros-chave por mudança de cena em uma única passada de decodificação
+
+Quadros amostrados (ex.: 1 por segundo) são reduzidos para uma miniatura em
+tons de cinza assim que decodificados; a diferença entre miniaturas
+consecutivas combina histograma (mudança de conteúdo/iluminação) e mapa de
+bordas (mudança de enquadramento). A varredura guarda só a miniatura anterior
+e os timestamps dos melhores candidatos; os quadros escolhidos são lidos de
+novo em resolução original apenas para a gravação, então a memória não cresce
+com a duração do vídeo nem com `top_k`.
+"""
+
+import os
+import json
+import time
+import heapq
+import itertools
+import cv2
+import numpy as np
+from service.frame_capture_service import iter_frames_at
+from service.frame_writer_service import FrameWriter
+
+HISTOGRAM_BINS = 32
+
+# Gradiente mínimo (0-255) para um pixel contar como borda
+EDGE_THRESHOLD = 24
+
+# Peso do histograma na pontuação (o restante vai para as bordas)
+HISTOGRAM_WEIGHT = 0.5
+
+def frame_signature(frame, width=160):
+    """Histograma normalizado e mapa de bordas de uma miniatura em cinza"""
+    height = max(1, int(frame.shape[0] * width / frame.shape[1]))
+    small = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    histogram = np.bincount((gray // (256 // HISTOGRAM_BINS)).ravel(), minlength=HISTOGRAM_BINS)
+    histogram = histogram / histogram.sum()
+
+    signed = gray.astype(np.int16)
+    gradient = np.abs(np.diff(signed, axis=1))[:-1, :] + np.abs(np.diff(signed, axis=0))[:, :-1]
+    edges = gradient > EDGE_THRESHOLD
+    return histogram, edges
+
+def scene_change_score(previous, current):
+    """Diferença entre duas assinaturas, de 0 (iguais) a 1"""
+    hist_diff = np.abs(previous[0] - current[0]).sum() / 2
+    edge_diff = np.count_nonzero(previous[1] ^ current[1]) / previous[1].size
+    return HISTOGRAM_WEIGHT * hist_diff + (1 - HISTOGRAM_WEIGHT) * edge_diff
+
+def extract_scene_keyframes(video_path, top_k=12, sample_fps=1.0, width=160, time_budget=0, min_gap=5.0):
+    """Retorna até `top_k` (timestamp, pontuação) em ordem de tempo
+
+    O vídeo é percorrido uma vez com grab(); só os quadros amostrados são
+    convertidos (retrieve). Com `time_budget` (s), a varredura para ao estourar
+    o tempo e usa o que já foi analisado. Quadros a menos de `min_gap` segundos
+    de outro escolhido (de pontuação maior) são ignorados.
+    """
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, int(round(fps / sample_fps)))
+    # Candidatos extras compensam os descartados por `min_gap`
+    capacity = max(1, top_k) * 3
+    candidates = []
+    order = itertools.count()
+    started = time.perf_counter()
+    previous = None
+    frame_index = 0
+
+    try:
+        while cap.grab():
+            index = frame_index
+            frame_index += 1
+            if index % step:
+                continue
+            if time_budget and time.perf_counter() - started > time_budget:
+                break
+
+            ret, frame = cap.retrieve()
+            if not ret:
+                continue
+            timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000 or index / fps
+            signature = frame_signature(frame, width)
+            # O primeiro quadro sempre representa a cena inicial
+            score = 1.0 if previous is None else scene_change_score(previous, signature)
+            previous = signature
+
+            entry = (score, next(order), timestamp)
+            if len(candidates) < capacity:
+                heapq.heappush(candidates, entry)
+            elif score > candidates[0][0]:
+                heapq.heapreplace(candidates, entry)
+    finally:
+        cap.release()
+
+    chosen = []
+    for score, _, timestamp in sorted(candidates, key=lambda c: -c[0]):
+        if len(chosen) >= top_k:
+            break
+        if all(abs(timestamp - other[0]) >= min_gap for other in chosen):
+            chosen.append((timestamp, score))
+    chosen.sort(key=lambda item: item[0])
+    return chosen
+
+def align_to_segments(timestamp, segments):
+    """Segmento da transcrição que contém `timestamp` (ou o mais próximo)"""
+    if not segments:
+        return None
+    best = min(
+        range(len(segments)),
+        key=lambda i: 0 if segments[i]["start"] <= timestamp <= segments[i]["end"]
+        else min(abs(segments[i]["start"] - timestamp), abs(segments[i]["end"] - timestamp))
+    )
+    return best
+
+def capture_scene_frames(video_path, output_dir, top_k=12, sample_fps=1.0, time_budget=0, min_gap=5.0):
+    """Grava os quadros-chave de cena em output_dir/frames
+
+    Não depende da transcrição, então roda enquanto o modelo transcreve.
+    Retorna (frames_dir, cenas); o índice é gravado por write_scene_index.
+    """
+    frames_dir = os.path.join(output_dir, "frames")
+    os.makedirs(frames_dir, exist_ok=True)
+
+    scores = dict(extract_scene_keyframes(video_path, top_k, sample_fps, time_budget=time_budget, min_gap=min_gap))
+
+    # Segunda leitura: só os quadros escolhidos são convertidos em resolução original
+    scenes = []
+    cap = cv2.VideoCapture(video_path)
+    try:
+        with FrameWriter(frames_dir) as writer:
+            for timestamp, frame in iter_frames_at(cap, list(scores)):
+                frame_name = writer.submit(frame, timestamp)
+                scenes.append({"timestamp": timestamp, "score": round(float(scores[timestamp]), 4),
+                               "frame": frame_name})
+    finally:
+        cap.release()
+    return frames_dir, scenes
+
+def write_scene_index(frames_dir, scenes, segments=None):
+    """Associa cada cena ao segmento da transcrição em que aparece e grava scenes.json"""
+    for scene in scenes:
+        index = align_to_segments(scene["timestamp"], segments)
+        if index is not None:
+            segment = segments[index]
+            scene.update({
+                "segment": index,
+                "segment_start": segment["start"],
+                "segment_end": segment["end"],
+                "text": segment["text"].strip(),
+            })
+
+    with open(os.path.join(frames_dir, "scenes.json"), "w", encoding="utf-8") as f:
+        json.dump(scenes, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,141 @@
+"""
+Escalonamento de jobs por duração (shortest-job-first com envelhecimento)
+
+O job com menor duração efetiva roda primeiro; a duração efetiva diminui com
+o tempo de espera, de modo que vídeos longos não ficam parados para sempre
+atrás de clipes curtos. Um job só é admitido se a memória estimada dos jobs em
+execução couber no orçamento de RAM (o primeiro job é sempre admitido).
+
+Não é thread-safe por si só: o chamador deve serializar o acesso.
+"""
+
+import time
+from service.hardware_service import get_available_memory_mb
+
+# Memória do buffer PCM (16 kHz, mono, float32) por segundo de áudio
+AUDIO_BUFFER_MB_PER_SECOND = 16000 * 4 / 1024**2
+
+# Duração assumida quando o probe falha
+UNKNOWN_DURATION = 3600
+
+def estimate_job_memory_mb(duration, model_memory_mb):
+    """Memória de trabalho do job: ativações/cópias do modelo + buffer de áudio"""
+    return model_memory_mb + (duration or UNKNOWN_DURATION) * AUDIO_BUFFER_MB_PER_SECOND
+
+class JobScheduler:
+    """Fila SJF com envelhecimento, controle de admissão por memória e ETA"""
+
+    def __init__(self, memory_budget_mb=0, aging=10.0, model_memory_mb=0, workers=1):
+        if not memory_budget_mb or memory_budget_mb <= 0:
+            memory_budget_mb = get_available_memory_mb()
+        self.memory_budget_mb = memory_budget_mb
+        # Segundos de áudio descontados da duração efetiva por segundo de espera
+        self.aging = aging
+        self.model_memory_mb = model_memory_mb
+        self.workers = max(1, workers)
+        self.queued = {}
+        self.running = {}
+        # Segundos de áudio transcritos por segundo de relógio (média móvel)
+        self.speed = None
+
+    def submit(self, job_id, video_path, duration):
+        job = {
+            "id": job_id,
+            "video_path": video_path,
+            "duration": duration,
+            "memory_mb": estimate_job_memory_mb(duration, self.model_memory_mb),
+            "submitted": time.time(),
+            "started": None,
+        }
+        self.queued[job_id] = job
+        return job
+
+    def _effective_duration(self, job, now):
+        duration = job["duration"] or UNKNOWN_DURATION
+        return duration - self.aging * (now - job["submitted"])
+
+    def _ordered(self, now):
+        return sorted(self.queued.values(), key=lambda job: (self._effective_duration(job, now), job["id"]))
+
+    def running_memory_mb(self):
+        return sum(job["memory_mb"] for job in self.running.values())
+
+    def _admits(self, job):
+        if not self.running or not self.memory_budget_mb:
+            return True
+        return self.running_memory_mb() + job["memory_mb"] <= self.memory_budget_mb
+
+    def next_job(self):
+        """Próximo job admissível (ou None); marca-o como em execução"""
+        if not self.queued:
+            return None
+        now = time.time()
+        job = self._ordered(now)[0]
+        # Sem furar a fila: se o próximo não cabe, aguarda memória ser liberada
+        if not self._admits(job):
+            return None
+        del self.queued[job["id"]]
+        job["started"] = now
+        self.running[job["id"]] = job
+        return job
+
+    def finish(self, job_id):
+        job = self.running.pop(job_id, None)
+        if job and job["duration"]:
+            elapsed = time.time() - job["started"]
+            if elapsed > 0:
+                speed = job["duration"] / elapsed
+                self.speed = speed if self.speed is None else 0.7 * self.speed + 0.3 * speed
+        return job
+
+    def _estimated_runtime(self, job):
+        if not self.speed:
+            return None
+        return (job["duration"] or UNKNOWN_DURATION) / self.speed
+
+    def snapshot(self):
+        """Profundidade da fila, espera e ETA de cada job"""
+        now = time.time()
+        jobs = []
+
+        # Simula a ordem atual: cada job começa quando o worker mais cedo fica livre
+        free_at = []
+        for job in self.running.values():
+            runtime = self._estimated_runtime(job)
+            remaining = max(0.0, job["started"] + runtime - now) if runtime is not None else None
+            free_at.append(remaining)
+            jobs.append(self._describe(job, now, "running", remaining))
+        free_at = [t if t is not None else 0.0 for t in free_at]
+        free_at += [0.0] * max(0, self.workers - len(free_at))
+        free_at.sort()
+
+        for job in self._ordered(now):
+            runtime = self._estimated_runtime(job)
+            if runtime is None:
+                eta = None
+            else:
+                start = free_at.pop(0)
+                eta = start + runtime
+                free_at.append(eta)
+                free_at.sort()
+            jobs.append(self._describe(job, now, "queued", eta))
+
+        return {
+            "queue_depth": len(self.queued),
+            "running": len(self.running),
+            "memory_budget_mb": self.memory_budget_mb,
+            "memory_in_use_mb": self.running_memory_mb(),
+            "speed": self.speed,
+            "jobs": jobs,
+        }
+
+    def _describe(self, job, now, state, eta):
+        return {
+            "id": job["id"],
+            "video_path": job["video_path"],
+            "state": state,
+            "duration": job["duration"],
+            "wait": (job["started"] or now) - job["submitted"],
+            # Segundos até o término estimado (None até o primeiro job concluir)
+            "eta": eta,
+        }
@@ -0,0 +1,258 @@
+"""
+Descoberta das ferramentas e do hardware, feita uma vez e persistida
+
+Caminho, versão e codecs do FFmpeg/ffprobe, extensões da CPU, núcleos
+utilizáveis (afinidade e quota do cgroup) e backends do PyTorch. A detecção
+custa vários subprocessos e a importação do torch, então o resultado fica em
+memória e em um JSON em disco; cada seção é revalidada pelo tamanho e mtime
+do executável (ou do pacote torch) que a produziu.
+"""
+
+import os
+import json
+import shutil
+import threading
+import subprocess
+import importlib.util
+from service.config_service import get_setting
+from service.hardware_service import get_cpu_info
+from service.log_service import log
+
+# Possíveis localizações do FFmpeg, na ordem de preferência
+FFMPEG_CANDIDATES = [
+    'ffmpeg',  # Sistema PATH
+    './ffmpeg.exe',  # Diretório atual
+    'ffmpeg/ffmpeg.exe',  # Subdiretório
+    'assets/ffmpeg/ffmpeg.exe',  # Assets
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ffmpeg.exe'),  # Executável
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'assets', 'ffmpeg', 'ffmpeg.exe'),
+]
+
+# seção -> informações detectadas neste processo
+_memo = {}
+_lock = threading.RLock()
+
+def _file_stamp(path):
+    """(tamanho, mtime) do arquivo, ou None se não existir"""
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+def _cache_path():
+    return get_setting("cache", "toolchain_cache", os.path.join("cache", "toolchain.json"))
+
+def _load_cache():
+    try:
+        with open(_cache_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_section(section, info):
+    path = _cache_path()
+    data = _load_cache()
+    data[section] = info
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+    except OSError as e:
+        log(f"⚠ Não foi possível gravar {path}: {e}")
+
+def _run_version(cmd):
+    """Primeira linha de `<cmd> -version`, ou None se o comando não funcionar"""
+    try:
+        result = subprocess.run([cmd, '-version'], capture_output=True, text=True, timeout=10)
+    except subprocess.TimeoutExpired:
+        log(f"✗ Timeout testando: {cmd}")
+        return None
+    except (FileNotFoundError, PermissionError):
+        return None
+    except Exception as e:
+        log(f"✗ Erro testando {cmd}: {e}")
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.split('\n')[0]
+
+def _list_codecs(cmd, kind):
+    """Nomes dos codecs de áudio e vídeo de `ffmpeg -decoders` / `-encoders`"""
+    codecs = {"audio": [], "video": []}
+    try:
+        result = subprocess.run([cmd, '-hide_banner', f'-{kind}'], capture_output=True, text=True, timeout=10)
+    except Exception:
+        return codecs
+    listing = False
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        if not listing:
+            listing = line.strip().startswith("------")
+            continue
+        if len(parts) < 2:
+            continue
+        if parts[0].startswith("A"):
+            codecs["audio"].append(parts[1])
+        elif parts[0].startswith("V"):
+            codecs["video"].append(parts[1])
+    return codecs
+
+def _resolve_candidate(candidate):
+    if os.path.basename(candidate) == candidate:
+        return shutil.which(candidate)
+    return os.path.abspath(candidate) if os.path.isfile(candidate) else None
+
+def _find_ffprobe(ffmpeg_path):
+    """ffprobe no mesmo diretório do FFmpeg, senão o do PATH"""
+    directory, name = os.path.split(ffmpeg_path)
+    sibling = os.path.join(directory, name.replace('ffmpeg', 'ffprobe'))
+    if os.path.isfile(sibling):
+        return sibling
+    return shutil.which('ffprobe')
+
+def _discover_ffmpeg():
+    for candidate in FFMPEG_CANDIDATES:
+        path = _resolve_candidate(candidate)
+        if not path:
+            continue
+        version = _run_version(path)
+        if not version:
+            continue
+
+        ffprobe_path = _find_ffprobe(path)
+        ffprobe_version = _run_version(ffprobe_path) if ffprobe_path else None
+        return {
+            "command": candidate,
+            "path": path,
+            "version": version,
+            "stamp": _file_stamp(path),
+            "env_path": os.environ.get("PATH", ""),
+            "decoders": _list_codecs(path, "decoders"),
+            "encoders": _list_codecs(path, "encoders"),
+            "ffprobe": {
+                "path": ffprobe_path,
+                "version": ffprobe_version,
+                "stamp": _file_stamp(ffprobe_path),
+            } if ffprobe_version else None,
+        }
+    return None
+
+def _ffmpeg_valid(info):
+    if info.get("stamp") is None or _file_stamp(info.get("path")) != info["stamp"]:
+        return False
+    # Outro FFmpeg pode ter entrado antes no PATH
+    if info.get("env_path") != os.environ.get("PATH", ""):
+        return False
+    ffprobe = info.get("ffprobe")
+    return not ffprobe or _file_stamp(ffprobe.get("path")) == ffprobe.get("stamp")
+
+def _torch_stamp():
+    """Identifica a instalação do torch e o ambiente de GPU sem importar o torch"""
+    spec = importlib.util.find_spec("torch")
+    if spec is None or not spec.origin:
+        return None
+    return {
+        "package": _file_stamp(spec.origin),
+        "driver": _file_stamp("/proc/driver/nvidia/version"),
+        "visible_devices": os.environ.get("CUDA_VISIBLE_DEVICES"),
+    }
+
+def _discover_torch():
+    stamp = _torch_stamp()
+    if stamp is None:
+        return None
+    import torch
+
+    info = {
+        "version": torch.__version__,
+        "stamp": stamp,
+        "cuda": False,
+        "devices": [],
+        "mps": False,
+        "mkldnn": torch.backends.mkldnn.is_available(),
+        "cpu_capability": None,
+    }
+    try:
+        info["cuda"] = torch.cuda.is_available()
+        for index in range(torch.cuda.device_count() if info["cuda"] else 0):
+            props = torch.cuda.get_device_properties(index)
+            info["devices"].append({"name": props.name, "memory_mb": props.total_memory // 1024**2})
+    except Exception as e:
+        log(f"Erro ao verificar GPU: {e}")
+        info["cuda"] = False
+    mps = getattr(torch.backends, "mps", None)
+    info["mps"] = bool(mps and mps.is_available())
+    cpu_backend = getattr(torch.backends, "cpu", None)
+    if cpu_backend and hasattr(cpu_backend, "get_cpu_capability"):
+        info["cpu_capability"] = cpu_backend.get_cpu_capability()
+    return info
+
+def _torch_valid(info):
+    return info.get("stamp") is not None and info["stamp"] == _torch_stamp()
+
+SECTIONS = {
+    "ffmpeg": (_discover_ffmpeg, _ffmpeg_valid),
+    "torch": (_discover_torch, _torch_valid),
+}
+
+def _get_section(section, refresh=False):
+    discover, valid = SECTIONS[section]
+    with _lock:
+        if not refresh and section in _memo:
+            return _memo[section]
+
+        info = None if refresh else _load_cache().get(section)
+        if info is not None and not valid(info):
+            info = None
+        if info is None:
+            info = discover()
+            # Ausência não é persistida: a ferramenta pode ser instalada depois
+            if info is not None:
+                _save_section(section, info)
+        _memo[section] = info
+        return info
+
+def get_ffmpeg_info(refresh=False):
+    """FFmpeg detectado (caminho, versão, codecs e ffprobe) ou None"""
+    return _get_section("ffmpeg", refresh)
+
+def get_torch_info(refresh=False):
+    """Versão e backends do PyTorch (CUDA, MPS, oneDNN) ou None se não instalado"""
+    return _get_section("torch", refresh)
+
+def get_toolchain(refresh=False):
+    """Todas as seções; a CPU é lida a cada processo (custo desprezível)"""
+    return {
+        "ffmpeg": get_ffmpeg_info(refresh),
+        "torch": get_torch_info(refresh),
+        "cpu": get_cpu_info(),
+    }
+
+def log_toolchain(refresh=False):
+    """Registra no log um resumo das ferramentas e do hardware detectados"""
+    toolchain = get_toolchain(refresh)
+    cpu = toolchain["cpu"]
+    features = [name.upper() for name, present in cpu["features"].items() if present]
+    log(f"✓ CPU: {cpu['usable_cores']} de {cpu['logical_cores']} núcleos utilizáveis"
+        + (f" ({', '.join(features)})" if features else ""))
+
+    torch_info = toolchain["torch"]
+    if torch_info:
+        log(f"✓ PyTorch carregado: {torch_info['version']}")
+        log(f"✓ CUDA disponível: {torch_info['cuda']}")
+        for device in torch_info["devices"]:
+            log(f"✓ GPU: {device['name']} ({device['memory_mb']} MB)")
+    else:
+        log("✗ PyTorch não encontrado")
+
+    ffmpeg_info = toolchain["ffmpeg"]
+    if ffmpeg_info:
+        log(f"✓ FFmpeg: {ffmpeg_info['version']}")
+        if not ffmpeg_info["ffprobe"]:
+            log("⚠ ffprobe não encontrado")
+    else:
+        log("✗ FFmpeg não encontrado")
+    return toolchain
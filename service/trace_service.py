@@ -0,0 +1,150 @@
+"""
+Spans de tempo por etapa, exportados como trace do Chrome/Perfetto
+
+Cada span registra tempo de parede, tempo de CPU da thread e contadores
+(bytes, segundos de áudio) de uma etapa do job; spans abertos dentro de outro
+aparecem aninhados na linha do tempo, e cada thread ganha sua própria trilha,
+o que mostra a sobreposição dos estágios e onde o job ficou parado.
+
+Com o trace desligado, span() devolve um objeto nulo compartilhado: o custo é
+uma leitura de variável global por chamada. Abra o JSON exportado em
+https://ui.perfetto.dev ou em chrome://tracing.
+"""
+
+import os
+import json
+import time
+import threading
+
+# Trace do job atual (None = desligado)
+_tracer = None
+
+class _NullSpan:
+    """Span usado com o trace desligado: não mede nada"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add(self, **counters):
+        pass
+
+    def set(self, **args):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    """Intervalo medido; `add` acumula contadores e `set` anexa informações"""
+
+    __slots__ = ("tracer", "name", "args", "start", "cpu_start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def add(self, **counters):
+        for key, value in counters.items():
+            self.args[key] = self.args.get(key, 0) + value
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        self.cpu_start = time.thread_time_ns()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        self.args["cpu_ms"] = round((time.thread_time_ns() - self.cpu_start) / 1e6, 3)
+        if exc_type:
+            self.args["error"] = str(exc) or exc_type.__name__
+        self.tracer.record(self.name, self.start, end, self.args)
+        return False
+
+class Tracer:
+    """Coleta os spans de um job (de todas as threads do processo)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.pid = os.getpid()
+        self.origin = time.perf_counter_ns()
+        self.cpu_origin = time.process_time_ns()
+        self.events = []
+        self.threads = {}
+
+    def record(self, name, start, end, args):
+        thread = threading.current_thread()
+        self.threads.setdefault(thread.ident, thread.name)
+        # list.append é atômico: não precisa de lock entre threads
+        self.events.append({
+            "name": name,
+            "ph": "X",
+            "ts": (start - self.origin) / 1000,
+            "dur": (end - start) / 1000,
+            "pid": self.pid,
+            "tid": thread.ident,
+            "args": args,
+        })
+
+    def to_chrome(self):
+        """Documento no formato Trace Event (JSON object format)"""
+        metadata = [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": self.name}}]
+        metadata += [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in self.threads.items()
+        ]
+        return {
+            "traceEvents": metadata + sorted(self.events, key=lambda e: e["ts"]),
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "job": self.name,
+                "wall_ms": round((time.perf_counter_ns() - self.origin) / 1e6, 3),
+                "process_cpu_ms": round((time.process_time_ns() - self.cpu_origin) / 1e6, 3),
+            },
+        }
+
+    def save(self, path):
+        """Grava o trace de forma atômica e retorna o caminho"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome(), f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return path
+
+    def summary(self):
+        """Totais por nome de span: [(nome, quantidade, parede_ms, cpu_ms)], do mais lento ao mais rápido"""
+        totals = {}
+        for event in self.events:
+            entry = totals.setdefault(event["name"], [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += event["dur"] / 1000
+            entry[2] += event["args"].get("cpu_ms", 0)
+        return sorted(((name, *entry) for name, entry in totals.items()), key=lambda item: -item[2])
+
+def span(name, **args):
+    """Context manager que mede a etapa `name` no trace atual (nulo se desligado)"""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, args)
+
+def tracing_enabled():
+    return _tracer is not None
+
+def start_trace(name):
+    """Inicia o trace de um job neste processo (um job por vez)"""
+    global _tracer
+    _tracer = Tracer(name)
+    return _tracer
+
+def stop_trace():
+    """Encerra o trace atual e o devolve (None se não havia trace)"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
@@ -0,0 +1,138 @@
+"""
+Detecção de atividade de voz (VAD) vetorizada com NumPy
+
+Cada quadro de 30ms é classificado pela energia (dBFS) e pela planicidade
+espectral (spectral flatness: ruído ~1, voz bem abaixo). A decisão usa
+histerese: regiões acima do limiar baixo só contam como fala se contiverem
+ao menos um quadro acima do limiar alto.
+"""
+
+import numpy as np
+from service.trace_service import span
+
+FRAME_MS = 30
+
+# Limiares padrão
+ENERGY_FLOOR_DB = -50.0      # abaixo disso é sempre silêncio
+ENERGY_MARGIN_HIGH_DB = 12.0  # acima do ruído de fundo para iniciar fala
+ENERGY_MARGIN_LOW_DB = 6.0    # acima do ruído de fundo para manter fala
+FLATNESS_HIGH = 0.30          # planicidade máxima para iniciar fala
+FLATNESS_LOW = 0.45           # planicidade máxima para manter fala
+
+# Pós-processamento dos trechos (segundos)
+MIN_SPEECH = 0.25
+MIN_SILENCE = 0.6
+SPEECH_PAD = 0.3
+
+# Quadros processados por bloco (limita memória da FFT em áudios longos)
+BLOCK_FRAMES = 4096
+
+def frame_features(audio, sample_rate=16000, frame_ms=FRAME_MS):
+    """Energia (dBFS) e planicidade espectral por quadro"""
+    frame_len = int(sample_rate * frame_ms / 1000)
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+    frames = np.asarray(audio[:n_frames * frame_len], dtype=np.float32).reshape(n_frames, frame_len)
+    window = np.hanning(frame_len).astype(np.float32)
+    energy = np.empty(n_frames, dtype=np.float32)
+    flatness = np.empty(n_frames, dtype=np.float32)
+    eps = 1e-10
+
+    for start in range(0, n_frames, BLOCK_FRAMES):
+        block = frames[start:start + BLOCK_FRAMES]
+        energy[start:start + len(block)] = 10 * np.log10(np.mean(block * block, axis=1) + eps)
+
+        power = np.abs(np.fft.rfft(block * window, axis=1)) ** 2 + eps
+        geometric = np.exp(np.mean(np.log(power), axis=1))
+        flatness[start:start + len(block)] = geometric / np.mean(power, axis=1)
+
+    return energy, flatness
+
+def _hysteresis(high, low):
+    """Mantém regiões contíguas de `low` que contenham algum quadro de `high`"""
+    if not low.any():
+        return low
+    # Rotula cada região contígua de `low` e verifica se ela contém `high`
+    region_starts = low & ~np.concatenate(([False], low[:-1]))
+    labels = np.cumsum(region_starts) * low
+    hits = np.bincount(labels, weights=(high & low).astype(np.float32)) > 0
+    hits[0] = False
+    return hits[labels]
+
+def _mask_to_spans(mask):
+    """Converte máscara booleana em lista de (início, fim) em quadros"""
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    changes = np.flatnonzero(np.diff(padded))
+    return list(zip(changes[::2], changes[1::2]))
+
+def detect_speech(audio, sample_rate=16000):
+    """Retorna os trechos de fala como lista de (amostra_inicial, amostra_final)"""
+    energy, flatness = frame_features(audio, sample_rate)
+    if len(energy) == 0:
+        return []
+
+    # Ruído de fundo estimado pelos quadros mais silenciosos
+    noise_floor = max(float(np.percentile(energy, 10)), ENERGY_FLOOR_DB - ENERGY_MARGIN_LOW_DB)
+    loud = energy > ENERGY_FLOOR_DB
+    high = loud & (energy > noise_floor + ENERGY_MARGIN_HIGH_DB) & (flatness < FLATNESS_HIGH)
+    low = loud & (energy > noise_floor + ENERGY_MARGIN_LOW_DB) & (flatness < FLATNESS_LOW)
+    speech = _hysteresis(high, low)
+
+    frame_len = int(sample_rate * FRAME_MS / 1000)
+    frame_s = FRAME_MS / 1000
+    spans = []
+    for start, end in _mask_to_spans(speech):
+        # Une trechos separados por silêncios curtos
+        if spans and (start - spans[-1][1]) * frame_s < MIN_SILENCE:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+
+    pad = int(SPEECH_PAD * sample_rate)
+    result = []
+    for start, end in spans:
+        if (end - start) * frame_s < MIN_SPEECH:
+            continue
+        start_sample = int(max(0, start * frame_len - pad))
+        end_sample = int(min(len(audio), end * frame_len + pad))
+        if result and start_sample <= result[-1][1]:
+            result[-1] = (result[-1][0], end_sample)
+        else:
+            result.append((start_sample, end_sample))
+    return result
+
+def filter_silent_segments(segments, sample_rate=16000, stats=None):
+    """Remove segmentos sem fala e apara o silêncio nas bordas dos demais
+
+    `stats` (dict opcional) acumula 'total_seconds' e 'skipped_seconds'.
+    Os offsets de cada segmento são ajustados para o trecho mantido.
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault("total_seconds", 0.0)
+    stats.setdefault("skipped_seconds", 0.0)
+
+    for segment_info in segments:
+        audio = segment_info['audio']
+        duration = len(audio) / sample_rate
+        stats["total_seconds"] += duration
+
+        with span("vad", audio_seconds=duration):
+            spans = detect_speech(audio, sample_rate)
+        if not spans:
+            stats["skipped_seconds"] += duration
+            continue
+
+        first, last = spans[0][0], spans[-1][1]
+        stats["skipped_seconds"] += (len(audio) - (last - first)) / sample_rate
+
+        trimmed = dict(segment_info)
+        trimmed['audio'] = audio[first:last]
+        trimmed['start_offset'] = segment_info['start_offset'] + first / sample_rate
+        trimmed['end_offset'] = segment_info['start_offset'] + last / sample_rate
+        if 'start_sample' in segment_info:
+            trimmed['start_sample'] = segment_info['start_sample'] + first
+            trimmed['end_sample'] = segment_info['start_sample'] + last
+        yield trimmed
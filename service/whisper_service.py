@@ -1,249 +1,26 @@
-import whisper
 import gc
 import os
-<<<<<<< HEAD
-import subprocess
-import shutil
-import platform
-import logging
-from pathlib import Path
-
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-def find_ffmpeg():
-    """
-    Encontra o executável do FFmpeg no sistema.
-    Retorna o caminho completo ou None se não encontrado.
-    """
-    # Primeiro, tenta encontrar no PATH do sistema
-    ffmpeg_path = shutil.which("ffmpeg")
-    if ffmpeg_path:
-        logger.info(f"🔍 FFmpeg encontrado no PATH: {ffmpeg_path}")
-        return ffmpeg_path
-    
-    # Tenta encontrar em locais comuns do Windows
-    if platform.system() == "Windows":
-        possible_paths = [
-            os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ffmpeg.exe"),
-            os.path.join(os.path.dirname(os.path.abspath(__file__)), "ffmpeg.exe"),
-            "C:\\ffmpeg\\bin\\ffmpeg.exe",
-            "C:\\Program Files\\ffmpeg\\bin\\ffmpeg.exe",
-            os.path.join(os.environ.get("TEMP", ""), "_MEI*", "ffmpeg.exe"),
-            os.path.join(os.environ.get("TEMP", ""), "_MEI*", "service", "..", "ffmpeg.exe")
-        ]
-        
-        for path in possible_paths:
-            if "*" in path:
-                # Para caminhos com wildcard (MEI)
-                import glob
-                matches = glob.glob(path)
-                for match in matches:
-                    if os.path.isfile(match):
-                        logger.info(f"🔍 FFmpeg encontrado: {match}")
-                        return match
-            elif os.path.isfile(path):
-                logger.info(f"🔍 FFmpeg encontrado: {path}")
-                return path
-    
-    logger.warning("⚠️ FFmpeg não encontrado no sistema")
-    return None
-
-def validate_ffmpeg(ffmpeg_path):
-    """
-    Valida se o FFmpeg está funcionando corretamente.
-    """
-    if not ffmpeg_path or not os.path.isfile(ffmpeg_path):
-        return False
-        
-    try:
-        result = subprocess.run(
-            [ffmpeg_path, "-version"], 
-            capture_output=True, 
-            text=True, 
-            timeout=10
-        )
-        if result.returncode == 0:
-            logger.info("✅ FFmpeg respondendo corretamente")
-            return True
-        else:
-            logger.error(f"❌ FFmpeg retornou erro: {result.stderr}")
-            return False
-    except Exception as e:
-        logger.error(f"❌ Erro ao validar FFmpeg: {e}")
-        return False
-
-def ffmpeg_probe_safe(video_path):
-    """
-    Analisa um arquivo de vídeo usando FFmpeg de forma segura.
-    """
-    ffmpeg_path = None
-    try:
-        # Encontra o FFmpeg
-        ffmpeg_path = find_ffmpeg()
-        if not ffmpeg_path:
-            raise Exception("FFmpeg não encontrado no sistema")
-        
-        logger.info(f"🔍 FFmpeg comando: {ffmpeg_path}")
-        
-        # Valida o FFmpeg
-        if not validate_ffmpeg(ffmpeg_path):
-            raise Exception("FFmpeg não está funcionando corretamente")
-        
-        # Executa o probe
-        cmd = [
-            ffmpeg_path, 
-            "-v", "quiet",
-            "-print_format", "json",
-            "-show_format",
-            "-show_streams",
-            video_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode != 0:
-            raise Exception(f"FFmpeg probe falhou: {result.stderr}")
-        
-        # Verifica se tem conteúdo válido
-        if not result.stdout.strip():
-            raise Exception("FFmpeg não retornou informações do arquivo")
-            
-        logger.info("✅ Arquivo de vídeo validado com sucesso")
-        return True
-        
-    except subprocess.TimeoutExpired:
-        logger.error("❌ Timeout ao analisar arquivo com ffmpeg")
-        raise Exception("Timeout ao analisar arquivo de vídeo")
-    except Exception as e:
-        logger.error(f"❌ Erro em ffmpeg_probe_safe: {e}")
-        logger.error(f"    Tipo do erro: {type(e).__name__}")
-        logger.error(f"    Video path: {video_path}")
-        logger.error(f"    FFmpeg cmd: {ffmpeg_path}")
-        logger.error(f"    FFMPEG_BINARY: {os.environ.get('FFMPEG_BINARY', 'não definido')}")
-        raise Exception(f"Erro ao analisar arquivo: {e}")
-
-def validate_video_file(video_path):
-    """
-    Valida se o arquivo de vídeo é válido e acessível.
-    """
-    try:
-        # Verifica se o arquivo existe
-        if not os.path.isfile(video_path):
-            raise Exception(f"Arquivo não encontrado: {video_path}")
-        
-        # Verifica se o arquivo não está vazio
-        if os.path.getsize(video_path) == 0:
-            raise Exception("Arquivo de vídeo está vazio")
-        
-        # Verifica extensão
-        valid_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm']
-        file_ext = Path(video_path).suffix.lower()
-        if file_ext not in valid_extensions:
-            logger.warning(f"⚠️ Extensão {file_ext} pode não ser suportada")
-        
-        # Valida com FFmpeg
-        ffmpeg_probe_safe(video_path)
-        
-        logger.info("✅ VALIDAÇÃO APROVADA: Arquivo de vídeo válido")
-        return True
-        
-    except Exception as e:
-        logger.error(f"✗ VALIDAÇÃO FALHOU: {e}")
-        raise Exception(f"Arquivo de vídeo inválido: {e}")
-
-def transcribe_audio_with_timestamps(video_path):
-    """
-    Transcreve o áudio de um vídeo usando Whisper com validação robusta.
-    """
-    try:
-        logger.info(f"🎬 Iniciando transcrição do vídeo: {os.path.basename(video_path)}")
-        
-        # Valida o arquivo de vídeo antes de tentar transcrever
-        validate_video_file(video_path)
-        
-        # Carrega o modelo Whisper
-        logger.info("🤖 Carregando modelo Whisper...")
-        model = whisper.load_model("small")
-        
-        # Executa a transcrição
-        logger.info("🎙️ Executando transcrição...")
-        result = model.transcribe(
-            video_path, 
-            language="pt",  # Português
-            word_timestamps=False,
-            verbose=False
-        )
-        
-        # Processa os segmentos
-        segments = result.get("segments", [])
-        transcription = []
-        
-        for segment in segments:
-            start = segment.get("start", 0)
-            end = segment.get("end", 0)
-            text = segment.get("text", "").strip()
-            
-            if text:  # Só adiciona se há texto
-                transcription.append({
-                    "start": start, 
-                    "end": end, 
-                    "text": text
-                })
-        
-        # Limpa a memória
-        del model
-        gc.collect()
-        
-        logger.info(f"✅ Transcrição concluída: {len(transcription)} segmentos processados")
-        return transcription
-        
-    except Exception as e:
-        logger.error(f"✗ ERRO NA TRANSCRIÇÃO: {e}")
-        logger.error(f"Tipo do erro: {type(e).__name__}")
-        
-        # Limpa a memória mesmo em caso de erro
-        try:
-            if 'model' in locals():
-                del model
-            gc.collect()
-        except:
-            pass
-            
-        raise e
-
-def save_transcription_to_txt(transcription, output_path):
-    """
-    Salva a transcrição em arquivo de texto com formatação melhorada.
-    """
-    try:
-        # Cria o diretório se não existir
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        with open(output_path, "w", encoding="utf-8") as f:
-            for i, segment in enumerate(transcription):
-                start = segment["start"]
-                end = segment["end"]
-                text = segment["text"]
-                
-                # Formata o timestamp
-                f.write(f"[{start:.2f} - {end:.2f}] {text}\n")
-        
-        logger.info(f"💾 Transcrição salva em: {output_path}")
-        
-    except Exception as e:
-        logger.error(f"❌ Erro ao salvar transcrição: {e}")
-        raise e
-=======
-import torch
 import tempfile
 import ffmpeg
+import numpy as np
 import shutil
 import sys
 from pathlib import Path
 import platform
 import subprocess
+from service.config_service import get_setting
+from service.log_service import log, set_log_callback
+from service.model_cache_service import get_model, resolve_precision
+from service.audio_stream_service import FfmpegPcmStream
+from service.parallel_transcribe_service import transcribe_segments_parallel
+from service.pipeline_service import Pipeline
+from service.vad_service import detect_speech, filter_silent_segments
+from service.result_cache_service import make_cache_key
+from service.checkpoint_service import open_journal
+from service.media_probe_service import probe_media
+from service.chunk_planner_service import fixed_chunk_plan, plan_chunks, rechunk_stream
+from service.toolchain_service import FFMPEG_CANDIDATES, get_ffmpeg_info, get_torch_info
+from service.trace_service import span
 
 # Importação para som de notificação
 try:
@@ -255,24 +32,27 @@ try:
 except ImportError:
     pass  # Som não disponível
 
-print(os.path.dirname(whisper.__file__))
-
-# Variável global para callback de log
-_log_callback = None
+# whisper e torch são importados nas funções que os usam (e pelo cache de
+# modelos), para que importar este módulo não custe o carregamento do PyTorch
 
 # Variável global para comando FFmpeg que funciona
 _ffmpeg_cmd = 'ffmpeg'
 
-def set_log_callback(callback):
-    """Define callback para logs"""
-    global _log_callback
-    _log_callback = callback
+# Resultado da última verificação bem-sucedida do FFmpeg (evita repetir `ffmpeg -version`)
+_ffmpeg_check = None
+
+# Assets do Whisper já verificados neste processo
+_whisper_assets_ok = False
+
+# Taxa de amostragem esperada pelo Whisper
+AUDIO_SAMPLE_RATE = 16000
+
+# Sons de notificação (desligados no modo sem interface)
+_notification_sound = True
 
-def log(message):
-    """Log que pode ser capturado pela interface"""
-    print(message)
-    if _log_callback:
-        _log_callback(message)
+def set_notification_sound(enabled):
+    global _notification_sound
+    _notification_sound = enabled
 
 def play_notification_sound(sound_type="completion"):
     """Toca um som de notificação ao finalizar a transcrição
@@ -284,6 +64,9 @@ def play_notification_sound(sound_type="completion"):
             - "alert": Som de alerta
             - "chime": Som de carrilhão
     """
+    if not _notification_sound:
+        return
+    
     try:
         system = platform.system()
         if system == "Windows":
@@ -330,10 +113,16 @@ def play_notification_sound(sound_type="completion"):
 
 def ensure_whisper_assets():
     """Garante que os assets do Whisper existam, especialmente em executáveis"""
+    global _whisper_assets_ok
+    if _whisper_assets_ok:
+        return True
+    import whisper
+
     try:
         # Primeiro tenta usar os assets normalmente
         import whisper.audio
         log("✓ Assets do Whisper disponíveis")
+        _whisper_assets_ok = True
         return True
     except Exception as e:
         log(f"⚠ Problema com assets, tentando corrigir: {e}")
@@ -381,6 +170,7 @@ def ensure_whisper_assets():
                 # Testa novamente
                 import whisper.audio
                 log("✓ Assets corrigidos com sucesso")
+                _whisper_assets_ok = True
                 return True
             else:
                 log("Não é executável PyInstaller, assets deveriam estar disponíveis")
@@ -391,79 +181,82 @@ def ensure_whisper_assets():
             return False
 
 def is_gpu_available():
+    """CUDA utilizável (detecção do toolchain_service, sem importar o torch se já persistida)"""
     try:
-        available = torch.cuda.is_available()
+        torch_info = get_torch_info()
+        available = bool(torch_info and torch_info["cuda"] and torch_info["devices"])
         log(f"CUDA disponível: {available}")
         if available:
-            log(f"Dispositivos CUDA: {torch.cuda.device_count()}")
-            log(f"GPU atual: {torch.cuda.get_device_name(0)}")
+            log(f"Dispositivos CUDA: {len(torch_info['devices'])}")
+            log(f"GPU atual: {torch_info['devices'][0]['name']}")
         return available
     except Exception as e:
         log(f"Erro ao verificar GPU: {e}")
         return False
 
-def check_ffmpeg_availability():
-    """Verifica se o FFmpeg está disponível e funcionando"""
-    
-    # Lista de possíveis localizações do FFmpeg
-    ffmpeg_paths = [
-        'ffmpeg',  # Sistema PATH
-        './ffmpeg.exe',  # Diretório atual
-        'ffmpeg/ffmpeg.exe',  # Subdiretório
-        'assets/ffmpeg/ffmpeg.exe',  # Assets
-        os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ffmpeg.exe'),  # Executável
-        os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'assets', 'ffmpeg', 'ffmpeg.exe'),
-    ]
+def preload_model(warm_up=False):
+    """Carrega o modelo configurado no cache de modelos (antes do primeiro job)
+
+    Com `warm_up`, roda também uma inferência curta em silêncio: a primeira
+    chamada ao modelo inicializa kernels e alocadores e é bem mais lenta que
+    as seguintes.
+    """
+    device = "cuda" if is_gpu_available() else "cpu"
+    model_size = get_setting("whisper", "model_size", "small")
+    precision = resolve_precision(device)
+    log(f"Carregando modelo {model_size} ({device})...")
+    model = get_model(model_size, device)
+    if warm_up:
+        warm_up_model(model, precision)
+    return model
+
+def warm_up_model(model, precision="fp32"):
+    """Inferência de aquecimento com 1 segundo de silêncio"""
+    log("Aquecendo o modelo...")
+    silence = np.zeros(AUDIO_SAMPLE_RATE, dtype=np.float32)
+    options = dict(get_decode_options(precision), temperature=0.0, condition_on_previous_text=False)
+    model.transcribe(silence, **options)
+    log("✓ Modelo pronto para transcrever")
+
+def check_ffmpeg_availability(force=False):
+    """Verifica se o FFmpeg está disponível e funcionando
+
+    A detecção é feita pelo toolchain_service (persistida em disco e
+    revalidada pelo mtime do executável); `force` refaz a detecção.
+    """
+    global _ffmpeg_check, _ffmpeg_cmd
+    if _ffmpeg_check and not force:
+        return _ffmpeg_check
     
-    # Tentar cada localização
-    for ffmpeg_cmd in ffmpeg_paths:
-        try:
-            result = subprocess.run([ffmpeg_cmd, '-version'], 
-                                  capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                version_line = result.stdout.split('\n')[0]
-                log(f"✓ FFmpeg encontrado: {ffmpeg_cmd}")
-                log(f"  {version_line}")
-                
-                # Salvar o comando que funcionou globalmente
-                global _ffmpeg_cmd
-                _ffmpeg_cmd = ffmpeg_cmd
-                return True, version_line
-        except subprocess.TimeoutExpired:
-            log(f"✗ Timeout testando: {ffmpeg_cmd}")
-            continue
-        except FileNotFoundError:
-            continue  # Tenta próximo
-        except Exception as e:
-            log(f"✗ Erro testando {ffmpeg_cmd}: {e}")
-            continue
+    info = get_ffmpeg_info(refresh=force)
+    if info:
+        log(f"✓ FFmpeg encontrado: {info['path']}")
+        log(f"  {info['version']}")
+        
+        # Salvar o comando que funcionou globalmente
+        _ffmpeg_cmd = 'ffmpeg' if info['command'] == 'ffmpeg' else info['path']
+        _ffmpeg_check = (True, info['version'])
+        return _ffmpeg_check
     
     # Se chegou aqui, não encontrou FFmpeg
     log("✗ FFmpeg não encontrado em nenhuma localização")
     log("  Localizações testadas:")
-    for path in ffmpeg_paths:
+    for path in FFMPEG_CANDIDATES:
         log(f"    - {path}")
     return False, "FFmpeg não encontrado no PATH"
 
 def ffmpeg_probe_safe(video_path):
-    """Executa ffmpeg.probe usando o comando FFmpeg correto"""
-    global _ffmpeg_cmd
-    
-    # Configurar temporariamente a variável de ambiente
-    original_ffmpeg = os.environ.get('FFMPEG_BINARY')
-    
-    try:
-        if _ffmpeg_cmd != 'ffmpeg':
-            os.environ['FFMPEG_BINARY'] = os.path.abspath(_ffmpeg_cmd)
-        
-        return ffmpeg.probe(video_path)
-    
-    finally:
-        # Restaurar configuração original
-        if original_ffmpeg:
-            os.environ['FFMPEG_BINARY'] = original_ffmpeg
-        elif 'FFMPEG_BINARY' in os.environ:
-            del os.environ['FFMPEG_BINARY']
+    """Executa ffmpeg.probe com o ffprobe correspondente ao FFmpeg detectado
+
+    O comando é passado diretamente (sem alterar os.environ), então pode ser
+    chamado de várias threads ao mesmo tempo (ex.: probe antecipado do lote).
+    """
+    return ffmpeg.probe(video_path, cmd=get_ffprobe_cmd())
+
+def get_media_info(video_path):
+    """MediaInfo do arquivo (um único ffprobe, memoizado e indexado em disco)"""
+    with span("probe", path=video_path):
+        return probe_media(video_path, ffmpeg_probe_safe)
 
 def configure_ffmpeg():
     """Configura o FFmpeg para uso da biblioteca python-ffmpeg"""
@@ -506,11 +299,11 @@ def validate_video_file(video_path):
         
         # Tenta ler informações básicas do arquivo com ffmpeg
         try:
-            probe = ffmpeg_probe_safe(video_path)
+            info = get_media_info(video_path)
             
             # Verifica se tem streams de vídeo ou áudio
-            video_streams = [s for s in probe['streams'] if s['codec_type'] == 'video']
-            audio_streams = [s for s in probe['streams'] if s['codec_type'] == 'audio']
+            video_streams = info.video_streams
+            audio_streams = info.audio_streams
             
             if not video_streams and not audio_streams:
                 log(f"✗ Arquivo não contém streams de vídeo ou áudio válidos")
@@ -526,11 +319,7 @@ def validate_video_file(video_path):
                 log(f"✓ Stream de áudio: {a_stream.get('codec_name', 'unknown')} - {a_stream.get('sample_rate', '?')} Hz")
             
             # Verifica duração
-            duration = None
-            for stream in probe['streams']:
-                if 'duration' in stream:
-                    duration = float(stream['duration'])
-                    break
+            duration = info.duration
             
             if duration:
                 log(f"✓ Duração: {duration:.2f} segundos")
@@ -554,16 +343,63 @@ def get_video_duration(video_path):
     """Obtém a duração do vídeo em segundos"""
     try:
         log(f"Analisando duração do vídeo: {video_path}")
-        probe = ffmpeg_probe_safe(video_path)
-        duration = float(probe['streams'][0]['duration'])
+        duration = get_media_info(video_path).duration
+        if not duration:
+            raise Exception("duração ausente no probe")
         log(f"Duração detectada: {duration:.2f} segundos")
         return duration
     except Exception as e:
         log(f"Erro ao obter duração do vídeo: {e}")
         return None
 
-def split_audio_segments(video_path, segment_duration=30):
-    """Divide o vídeo em segmentos de áudio temporários"""
+def decode_audio_track(video_path, temp_dir):
+    """Decodifica a trilha de áudio inteira uma única vez (16 kHz, mono, float32)
+
+    O PCM é gravado em um único arquivo bruto e devolvido como memmap, de modo
+    que os trechos possam ser fatiados sem cópias nem novos processos do FFmpeg.
+    """
+    with span("decode_audio") as trace:
+        buffer_file = os.path.join(temp_dir, "audio_16k_f32.raw")
+        log(f"Decodificando trilha de áudio completa: {buffer_file}")
+        try:
+            (
+                ffmpeg
+                .input(video_path)
+                .output(buffer_file, format='f32le', acodec='pcm_f32le', ac=1, ar=str(AUDIO_SAMPLE_RATE))
+                .overwrite_output()
+                .run(cmd=_ffmpeg_cmd, quiet=True, capture_stdout=True, capture_stderr=True)
+            )
+        except ffmpeg.Error as e:
+            log(f"✗ Erro do ffmpeg ao decodificar áudio: {e.stderr}")
+            raise Exception(f"Falha ao decodificar áudio do vídeo: {e}")
+
+        if not os.path.exists(buffer_file) or os.path.getsize(buffer_file) == 0:
+            raise Exception("Vídeo não contém áudio decodificável")
+
+        # mode='c' (copy-on-write) mantém o buffer somente-leitura em disco, mas
+        # entrega ao torch um array gravável sem copiar os dados
+        audio = np.memmap(buffer_file, dtype=np.float32, mode='c')
+        trace.add(bytes=os.path.getsize(buffer_file), audio_seconds=len(audio) / AUDIO_SAMPLE_RATE)
+        log(f"✓ Áudio decodificado: {len(audio) / AUDIO_SAMPLE_RATE:.2f}s ({os.path.getsize(buffer_file):,} bytes)")
+    return audio, buffer_file
+
+def get_ffprobe_cmd():
+    """ffprobe correspondente ao FFmpeg detectado (mesmo diretório)"""
+    info = get_ffmpeg_info()
+    if info and info["ffprobe"]:
+        return info["ffprobe"]["path"]
+    directory, name = os.path.split(_ffmpeg_cmd)
+    return os.path.join(directory, name.replace('ffmpeg', 'ffprobe'))
+
+def split_audio_segments(video_path, segment_duration=30, adaptive=False, vad_stats=None):
+    """Divide o áudio do vídeo em segmentos em memória
+
+    O áudio é decodificado uma única vez; cada segmento é uma fatia NumPy do
+    buffer mapeado em memória, pronta para ser passada direto ao modelo.
+    Com `adaptive`, os cortes seguem o plano de chunk_planner_service (pontos
+    de baixa energia) e, se `vad_stats` for informado, os trechos de fala do
+    VAD são agrupados e o silêncio entre eles é descartado.
+    """
     # Primeiro verifica se o arquivo é válido novamente
     if not os.path.exists(video_path):
         log(f"✗ Arquivo não existe para segmentação: {video_path}")
@@ -575,7 +411,7 @@ def split_audio_segments(video_path, segment_duration=30):
         
         # Última tentativa: verifica se o arquivo pode ser lido pelo ffmpeg
         try:
-            test_probe = ffmpeg_probe_safe(video_path)
+            get_media_info(video_path)
             log("✓ Arquivo pode ser lido pelo ffmpeg, prosseguindo sem segmentação")
             return [video_path]  # Retorna o arquivo original se ffmpeg consegue lê-lo
         except Exception as e:
@@ -584,58 +420,76 @@ def split_audio_segments(video_path, segment_duration=30):
     
     # Se chegou aqui, temos duração válida
     log(f"Dividindo vídeo em segmentos de {segment_duration}s (duração total: {duration:.2f}s)")
-    segments = []
     temp_dir = tempfile.mkdtemp()
     log(f"Diretório temporário: {temp_dir}")
     
-    for start_time in range(0, int(duration), segment_duration):
-        end_time = min(start_time + segment_duration, duration)
-        segment_file = os.path.join(temp_dir, f"segment_{start_time}_{end_time}.wav")
-        
-        try:
-            log(f"Criando segmento {start_time}-{end_time}s")
-            (
-                ffmpeg
-                .input(video_path, ss=start_time, t=segment_duration)
-                .output(segment_file, acodec='pcm_s16le', ac=1, ar='16000')
-                .overwrite_output()
-                .run(quiet=True, capture_stdout=True, capture_stderr=True)
-            )
-            
-            # Verifica se o arquivo foi criado e tem tamanho > 0
-            if os.path.exists(segment_file) and os.path.getsize(segment_file) > 0:
-                segments.append({
-                    'file': segment_file,
-                    'start_offset': start_time,
-                    'end_offset': end_time
-                })
-                log(f"✓ Segmento criado: {segment_file} ({os.path.getsize(segment_file):,} bytes)")
-            else:
-                log(f"⚠ Segmento {start_time}-{end_time}s não foi criado ou está vazio")
-                
-        except ffmpeg.Error as e:
-            log(f"✗ Erro do ffmpeg ao criar segmento {start_time}-{end_time}: {e.stderr}")
-        except Exception as e:
-            log(f"✗ Erro inesperado ao criar segmento {start_time}-{end_time}: {e}")
+    try:
+        audio, buffer_file = decode_audio_track(video_path, temp_dir)
+    except Exception:
+        release_audio_buffer(temp_dir)
+        raise
+    
+    # A duração real vem do PCM decodificado, não do probe
+    total_samples = len(audio)
+    
+    if adaptive:
+        speech_spans = None
+        if vad_stats is not None:
+            with span("vad", audio_seconds=total_samples / AUDIO_SAMPLE_RATE):
+                speech_spans = detect_speech(audio, AUDIO_SAMPLE_RATE)
+        with span("plan_chunks", audio_seconds=total_samples / AUDIO_SAMPLE_RATE):
+            plan = plan_chunks(audio, AUDIO_SAMPLE_RATE, max_seconds=segment_duration, speech_spans=speech_spans)
+        log(f"Plano adaptativo: {len(plan)} trechos com cortes em pontos de silêncio")
+        
+        if vad_stats is not None:
+            planned = sum(entry['end_sample'] - entry['start_sample'] for entry in plan)
+            vad_stats["total_seconds"] = total_samples / AUDIO_SAMPLE_RATE
+            vad_stats["skipped_seconds"] = (total_samples - planned) / AUDIO_SAMPLE_RATE
+    else:
+        plan = fixed_chunk_plan(total_samples, AUDIO_SAMPLE_RATE, segment_duration)
+    
+    segments = [
+        dict(entry, audio=audio[entry['start_sample']:entry['end_sample']], buffer_file=buffer_file)
+        for entry in plan
+    ]
     
     if len(segments) == 0:
+        del audio
+        release_audio_buffer(temp_dir)
+        if adaptive and vad_stats is not None and total_samples:
+            log("✗ Nenhum trecho de fala detectado no áudio")
+            raise Exception("Nenhuma fala detectada no áudio do vídeo")
         log("✗ Nenhum segmento foi criado com sucesso")
-        # Remove diretório temporário vazio
-        try:
-            os.rmdir(temp_dir)
-        except:
-            pass
         raise Exception("Falha ao criar segmentos de áudio do vídeo")
     
     log(f"Total de segmentos criados: {len(segments)}")
     return segments
 
-def transcribe_audio_with_timestamps(video_path, progress_callback=None):
+def release_audio_buffer(temp_dir):
+    """Remove o buffer PCM temporário e seu diretório"""
+    try:
+        shutil.rmtree(temp_dir)
+        log(f"Diretório temporário removido: {temp_dir}")
+    except Exception as e:
+        log(f"Aviso: Não foi possível remover diretório temporário: {e}")
+
+def transcribe_audio_with_timestamps(video_path, progress_callback=None, chunk_callback=None, report=None):
+    """Transcreve o áudio do vídeo e retorna a lista de segmentos {start, end, text}
+
+    `chunk_callback(start_offset, end_offset, partes)` é chamado a cada trecho
+    concluído (ex.: para capturar quadros enquanto a transcrição avança).
+    Trechos que falham não interrompem o job: se `report` (dict) for informado,
+    recebe em "failed" os intervalos (início, fim) que ficaram sem transcrição.
+    """
+    if report is not None:
+        report["failed"] = []
     log("=== INICIANDO TRANSCRIÇÃO DE ÁUDIO ===")
     
     # Configura FFmpeg primeiro
     log("Configurando FFmpeg...")
-    if not configure_ffmpeg():
+    with span("configure_ffmpeg"):
+        ffmpeg_configured = configure_ffmpeg()
+    if not ffmpeg_configured:
         log("✗ Falha na configuração do FFmpeg")
         play_notification_sound("alert")
         raise Exception("Falha na configuração do FFmpeg")
@@ -650,7 +504,8 @@ def transcribe_audio_with_timestamps(video_path, progress_callback=None):
     
     # Primeiro valida se o arquivo é válido
     log("Validando arquivo de vídeo...")
-    is_valid, error_message = validate_video_file(video_path)
+    with span("validate"):
+        is_valid, error_message = validate_video_file(video_path)
     
     if not is_valid:
         log(f"✗ VALIDAÇÃO FALHOU: {error_message}")
@@ -662,7 +517,9 @@ def transcribe_audio_with_timestamps(video_path, progress_callback=None):
     
     # Garante que os assets do Whisper existam
     log("Verificando assets do Whisper...")
-    if not ensure_whisper_assets():
+    with span("whisper_assets"):
+        assets_ok = ensure_whisper_assets()
+    if not assets_ok:
         log("✗ Assets do Whisper não disponíveis")
         play_notification_sound("alert")
         raise Exception("Não foi possível garantir os assets do Whisper")
@@ -673,142 +530,324 @@ def transcribe_audio_with_timestamps(video_path, progress_callback=None):
     device = "cuda" if is_gpu_available() else "cpu"
     log(f"Dispositivo selecionado: {device}")
     
-    # Divide o vídeo em segmentos
-    log("Dividindo vídeo em segmentos...")
-    segments = split_audio_segments(video_path, segment_duration=30)
-    
-    if len(segments) == 1 and segments[0] == video_path:
-        # Se não conseguiu dividir, processa o arquivo original
-        log("Processando arquivo original (sem divisão)")
-        
-        # Validação adicional antes de carregar o modelo
-        if not os.path.exists(video_path):
-            log(f"✗ Arquivo original não existe: {video_path}")
-            raise Exception(f"Arquivo não encontrado: {video_path}")
-        
+    model_size = get_setting("whisper", "model_size", "small")
+    precision = resolve_precision(device)
+    decode_options = get_decode_options(precision)
+    
+    engine = get_setting("performance", "engine", "sequential")
+    adaptive = get_setting("performance", "adaptive_chunking")
+    streaming = get_setting("performance", "streaming")
+    use_pipeline = get_setting("performance", "pipeline")
+    if engine == "parallel" and (streaming or use_pipeline or device != "cpu"):
+        log("⚠ Modo paralelo requer CPU e áudio em buffer (streaming e pipeline desligados); usando sequencial")
+        engine = "sequential"
+    
+    stream = None
+    pipeline = None
+    temp_dir = None
+    # Estatísticas do VAD (None = desligado)
+    vad_stats = {} if get_setting("performance", "vad") else None
+    
+    # Diário de trechos concluídos (retoma o job após uma interrupção)
+    journal = None
+    if get_setting("cache", "checkpoint"):
         try:
-            log("Carregando modelo Whisper...")
-            model = whisper.load_model("small", device=device)
-            log("✓ Modelo carregado com sucesso")
-            
-            log("Iniciando transcrição do arquivo original...")
-            # Adiciona timeout e tratamento de erro mais robusto
-            result = model.transcribe(video_path, language="Portuguese", word_timestamps=False)
-            log("✓ Transcrição concluída")
-            
-            if not result or "segments" not in result:
-                log("✗ Resultado da transcrição está vazio ou inválido")
-                raise Exception("Transcrição retornou resultado inválido")
-            
-            transcription = []
-            for segment in result["segments"]:
-                start = segment["start"]
-                end = segment["end"]
-                text = segment["text"]
-                transcription.append({"start": start, "end": end, "text": text})
-            
-            if not transcription:
-                log("✗ Nenhum segmento de transcrição foi criado")
-                raise Exception("Transcrição não produziu nenhum resultado")
-            
-            log(f"Total de segmentos transcritos: {len(transcription)}")
-            
-            del model
-            gc.collect()
-            log("Modelo removido da memória")
-            
-            # Toca som de conclusão
-            play_notification_sound("completion")
-            
-            return transcription
-            
+            journal = open_journal(
+                make_cache_key(video_path, get_transcription_options()),
+                get_setting("cache", "checkpoint_dir", os.path.join("cache", "checkpoints")),
+                sync_every=get_setting("cache", "checkpoint_sync_every", 8)
+            )
         except Exception as e:
-            log(f"✗ Erro na transcrição do arquivo original: {e}")
-            # Limpa modelo da memória mesmo em caso de erro
-            try:
-                del model
-                gc.collect()
-            except:
-                pass
-            raise
+            log(f"⚠ Checkpoint indisponível: {e}")
+    
+    if streaming or use_pipeline:
+        # FFmpeg decodifica por pipe enquanto o modelo consome
+        total_duration = get_video_duration(video_path)
+        if use_pipeline:
+            pipeline = Pipeline(queue_size=get_setting("performance", "pipeline_queue_size", 2))
+        stream = FfmpegPcmStream(
+            video_path,
+            ffmpeg_cmd=_ffmpeg_cmd,
+            sample_rate=AUDIO_SAMPLE_RATE,
+            window_seconds=30,
+            slots=get_setting("performance", "stream_buffer_windows", 4),
+            # A decodificação de fato acontece na thread leitora do stream
+            stats=pipeline.observe("Decodificação (FFmpeg)") if pipeline else None
+        ).start()
+        segments = stream.windows()
+        if adaptive:
+            segments = rechunk_stream(segments, AUDIO_SAMPLE_RATE)
+        if vad_stats is not None:
+            segments = filter_silent_segments(segments, AUDIO_SAMPLE_RATE, vad_stats)
+        if journal:
+            segments = journal.pending(segments)
+        
+        if pipeline:
+            # Preparação (recorte, VAD, cópia do slot) em thread própria, adiantando
+            # os próximos trechos; seu tempo ocupado inclui a espera pela decodificação
+            log("Pipeline: decodificação, preparação e transcrição em estágios sobrepostos...")
+            segments = pipeline.stage(segments, "Preparação", transform=detach_segment)
+            segments = pipeline.consume(segments, "Transcrição")
+        else:
+            log("Modo streaming: transcrevendo janelas conforme são decodificadas...")
+    else:
+        # Divide o vídeo em segmentos
+        log("Dividindo vídeo em segmentos...")
+        with span("split", adaptive=bool(adaptive)) as trace:
+            segments = split_audio_segments(video_path, segment_duration=30, adaptive=adaptive, vad_stats=vad_stats)
+            trace.set(chunks=len(segments))
+    
+        if len(segments) == 1 and segments[0] == video_path:
+            # Se não conseguiu dividir, processa o arquivo original
+            if journal:
+                journal.close()
+            return transcribe_original_file(video_path, model_size, device, decode_options)
+        
+        temp_dir = os.path.dirname(segments[0]['buffer_file'])
+        total_duration = segments[-1]['end_offset']
+        # No plano adaptativo o VAD já foi aplicado ao agrupar os trechos de fala
+        if vad_stats is not None and not adaptive:
+            segments = filter_silent_segments(segments, AUDIO_SAMPLE_RATE, vad_stats)
+        if journal:
+            segments = journal.pending(segments)
+    
+    # Os motores apenas registram no log os trechos que falham; o intervalo de
+    # cada trecho entregue é comparado com os concluídos ao final
+    planned = []
+    completed = set()
+    segments = _track_planned(segments, planned)
+    notify = chunk_callback
+    
+    def chunk_callback(start_offset, end_offset, parts):
+        completed.add(_chunk_key(start_offset, end_offset))
+        if journal:
+            journal.record(start_offset, end_offset, parts)
+        if notify:
+            notify(start_offset, end_offset, parts)
     
     # Processa segmento por segmento
     log("Processando segmentos individualmente...")
     try:
-        log("Carregando modelo Whisper...")
-        model = whisper.load_model("small", device=device)
-        log("✓ Modelo carregado com sucesso")
-    except Exception as e:
-        log(f"✗ Erro ao carregar modelo: {e}")
-        raise
+        try:
+            with span("load_model", model=model_size, device=device):
+                model = get_model(model_size, device)
+        except Exception as e:
+            log(f"✗ Erro ao carregar modelo: {e}")
+            raise
+        
+        with span("transcribe", engine=engine, device=device, precision=precision):
+            if engine == "parallel":
+                all_transcription = transcribe_segments_parallel(
+                    (model_size, device), segments, progress_callback, decode_options,
+                    workers=get_setting("performance", "parallel_workers", 0),
+                    threads_per_worker=get_setting("performance", "parallel_threads_per_worker", 4),
+                    chunk_callback=chunk_callback
+                )
+            elif engine == "batched":
+                from service.batch_decode_service import auto_batch_size, transcribe_segments_batched
+                batch_size = auto_batch_size(model_size, get_setting("performance", "batch_size", 0))
+                log(f"Motor em lote: até {batch_size} janelas por passada do modelo")
+                all_transcription = transcribe_segments_batched(
+                    model, segments, batch_size, progress_callback, total_duration, decode_options,
+                    chunk_callback=chunk_callback
+                )
+            else:
+                all_transcription = transcribe_segments(
+                    model, segments, progress_callback, total_duration, decode_options,
+                    chunk_callback=chunk_callback
+                )
+        
+        failed = [chunk for chunk in planned if _chunk_key(*chunk) not in completed]
+        
+        if journal:
+            if journal.skipped:
+                log(f"♻ {journal.skipped} trechos reaproveitados do checkpoint")
+            # Junta os trechos desta execução com os das execuções anteriores
+            all_transcription = journal.results()
+            if journal.missing(planned):
+                # Mantém o diário: a próxima execução refaz apenas os trechos faltantes
+                log(f"♻ Checkpoint mantido em {journal.path}")
+            else:
+                journal.discard()
+        
+        if failed:
+            start_offset, end_offset = failed[0]
+            log(f"⚠ {len(failed)} de {len(planned)} trechos falharam (primeiro: {start_offset:.2f}-{end_offset:.2f}s)")
+            if report is not None:
+                report["failed"] = failed
+    finally:
+        if journal:
+            journal.close()
+        # Libera as fatias do memmap antes de remover o buffer (necessário no Windows)
+        segments = None
+        if stream:
+            stream.close()
+        if temp_dir:
+            release_audio_buffer(temp_dir)
+    
+    if pipeline:
+        for line in pipeline.report():
+            log(f"⏱ {line}")
+    
+    if vad_stats:
+        skipped = vad_stats["skipped_seconds"]
+        total = vad_stats["total_seconds"] or 1
+        log(f"🔇 VAD: {skipped:.1f}s sem fala ignorados ({skipped / total:.0%} do áudio)")
+    
+    # Progresso final
+    if progress_callback:
+        progress_callback(100)
+    
+    log(f"Total de segmentos transcritos: {len(all_transcription)}")
+    
+    # O modelo permanece no cache para o próximo vídeo; libera apenas as referências locais
+    del model
+    gc.collect()
+
+    log("=== TRANSCRIÇÃO DE ÁUDIO CONCLUÍDA ===")
+    
+    # Toca som de conclusão da transcrição
+    play_notification_sound("completion")
     
+    return all_transcription
+
+def _chunk_key(start_offset, end_offset):
+    # Milissegundos, como no diário de checkpoint
+    return round(start_offset * 1000), round(end_offset * 1000)
+
+def _track_planned(segments, planned):
+    """Repassa os segmentos anotando o intervalo de cada um em `planned`"""
+    for segment_info in segments:
+        planned.append((segment_info['start_offset'], segment_info['end_offset']))
+        yield segment_info
+
+def detach_segment(segment_info):
+    """Copia o áudio do segmento para que o slot do ring buffer possa ser reutilizado"""
+    return dict(segment_info, audio=np.array(segment_info['audio'], dtype=np.float32))
+
+def get_decode_options(precision="fp32"):
+    """Opções de decodificação repassadas ao model.transcribe"""
+    return {
+        "language": "Portuguese",
+        "word_timestamps": False,
+        "fp16": precision == "fp16",
+    }
+
+def get_transcription_options():
+    """Configurações que alteram o resultado da transcrição (chave do cache de resultados)"""
+    device = "cuda" if is_gpu_available() else "cpu"
+    precision = resolve_precision(device)
+    return {
+        "model_size": get_setting("whisper", "model_size", "small"),
+        "precision": precision,
+        "decode_options": get_decode_options(precision),
+        "engine": get_setting("performance", "engine", "sequential"),
+        "adaptive_chunking": get_setting("performance", "adaptive_chunking"),
+        "vad": get_setting("performance", "vad"),
+    }
+
+def transcribe_segments(model, segments, progress_callback=None, total_duration=None, decode_options=None,
+                        chunk_callback=None):
+    """Transcreve uma sequência de segmentos de áudio ajustando os timestamps pelo offset
+
+    Aceita tanto a lista de split_audio_segments quanto o gerador do modo
+    streaming; cada segmento é transcrito assim que fica disponível.
+    `chunk_callback(start_offset, end_offset, partes)` é chamado a cada segmento concluído.
+    """
+    if decode_options is None:
+        decode_options = get_decode_options()
     all_transcription = []
     
     for i, segment_info in enumerate(segments):
         try:
-            log(f"Processando segmento {i+1}/{len(segments)}: {segment_info['start_offset']}-{segment_info['end_offset']}s")
+            log(f"Processando segmento {i+1}: {segment_info['start_offset']:.2f}-{segment_info['end_offset']:.2f}s")
             
-            if progress_callback:
-                progress = int((i / len(segments)) * 100)
+            if progress_callback and total_duration:
+                progress = min(99, int((segment_info['start_offset'] / total_duration) * 100))
                 progress_callback(progress)
             
-            result = model.transcribe(segment_info['file'], language="Portuguese", word_timestamps=False)
+            with span("transcribe_chunk", start=segment_info['start_offset'], end=segment_info['end_offset'],
+                      audio_seconds=segment_info['end_offset'] - segment_info['start_offset']):
+                result = model.transcribe(segment_info['audio'], **decode_options)
             log(f"✓ Segmento {i+1} transcrito com {len(result['segments'])} partes")
             
             # Ajusta os timestamps com o offset do segmento
+            parts = []
             for seg in result["segments"]:
                 adjusted_start = seg["start"] + segment_info['start_offset']
                 adjusted_end = seg["end"] + segment_info['start_offset']
                 text = seg["text"]
-                all_transcription.append({
+                parts.append({
                     "start": adjusted_start, 
                     "end": adjusted_end, 
                     "text": text
                 })
+            all_transcription.extend(parts)
             
-            # Remove arquivo temporário
-            os.remove(segment_info['file'])
-            log(f"Arquivo temporário removido: {segment_info['file']}")
+            if chunk_callback:
+                chunk_callback(segment_info['start_offset'], segment_info['end_offset'], parts)
             
         except Exception as e:
             log(f"✗ Erro ao transcrever segmento {i}: {e}")
     
-    # Progresso final
-    if progress_callback:
-        progress_callback(100)
-    
-    log(f"Total de segmentos transcritos: {len(all_transcription)}")
+    return all_transcription
+
+def transcribe_original_file(video_path, model_size, device, decode_options):
+    """Transcreve o arquivo original inteiro quando não foi possível segmentá-lo"""
+    log("Processando arquivo original (sem divisão)")
     
-    del model
-    gc.collect()
-    log("Modelo removido da memória")
+    # Validação adicional antes de carregar o modelo
+    if not os.path.exists(video_path):
+        log(f"✗ Arquivo original não existe: {video_path}")
+        raise Exception(f"Arquivo não encontrado: {video_path}")
     
-    # Remove diretório temporário
     try:
-        temp_dir = os.path.dirname(segments[0]['file'])
-        os.rmdir(temp_dir)
-        log(f"Diretório temporário removido: {temp_dir}")
+        with span("load_model", model=model_size, device=device):
+            model = get_model(model_size, device)
+        
+        log("Iniciando transcrição do arquivo original...")
+        # Adiciona timeout e tratamento de erro mais robusto
+        with span("transcribe", engine="original_file", device=device):
+            result = model.transcribe(video_path, **decode_options)
+        log("✓ Transcrição concluída")
+        
+        if not result or "segments" not in result:
+            log("✗ Resultado da transcrição está vazio ou inválido")
+            raise Exception("Transcrição retornou resultado inválido")
+        
+        transcription = []
+        for segment in result["segments"]:
+            start = segment["start"]
+            end = segment["end"]
+            text = segment["text"]
+            transcription.append({"start": start, "end": end, "text": text})
+        
+        if not transcription:
+            log("✗ Nenhum segmento de transcrição foi criado")
+            raise Exception("Transcrição não produziu nenhum resultado")
+        
+        log(f"Total de segmentos transcritos: {len(transcription)}")
+        
+        # Toca som de conclusão
+        play_notification_sound("completion")
+        
+        return transcription
+        
     except Exception as e:
-        log(f"Aviso: Não foi possível remover diretório temporário: {e}")
-
-    log("=== TRANSCRIÇÃO DE ÁUDIO CONCLUÍDA ===")
-    
-    # Toca som de conclusão da transcrição
-    play_notification_sound("completion")
-    
-    return all_transcription
+        log(f"✗ Erro na transcrição do arquivo original: {e}")
+        raise
 
 def save_transcription_to_txt(transcription, output_path):
     log(f"Salvando transcrição em: {output_path}")
     try:
-        with open(output_path, "w", encoding="utf-8") as f:
+        with span("write_output", file=output_path) as trace, open(output_path, "w", encoding="utf-8") as f:
             for segment in transcription:
                 start = segment["start"]
                 end = segment["end"]
                 text = segment["text"]
                 f.write(f"[{start:.2f} - {end:.2f}] {text}\n")
+            trace.add(bytes=f.tell())
         log(f"✓ Arquivo salvo com {len(transcription)} segmentos")
     except Exception as e:
         log(f"✗ Erro ao salvar arquivo: {e}")
         raise
->>>>>>> 97265ce0a4e234e2ef96a2bae8fdabdb046cbb5e
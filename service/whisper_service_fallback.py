@@ -1,14 +1,11 @@
-import whisper
 import gc
 import os
-import torch
 import tempfile
-import ffmpeg
-import requests
 import urllib.request
 from pathlib import Path
 
-print(os.path.dirname(whisper.__file__))
+# whisper, torch e ffmpeg são importados nas funções que os usam: importar
+# este módulo não deve custar o carregamento do PyTorch
 
 # Variável global para callback de log
 _log_callback = None
@@ -26,6 +23,8 @@ def log(message):
 
 def ensure_whisper_assets():
     """Garante que os assets do Whisper existam"""
+    import whisper
+
     try:
         # Primeiro tenta carregar normalmente
         import whisper.audio
@@ -62,6 +61,8 @@ def ensure_whisper_assets():
 
 def is_gpu_available():
     try:
+        import torch
+
         available = torch.cuda.is_available()
         log(f"CUDA disponível: {available}")
         if available:
@@ -75,6 +76,8 @@ def is_gpu_available():
 def get_video_duration(video_path):
     """Obtém a duração do vídeo em segundos"""
     try:
+        import ffmpeg
+
         log(f"Analisando duração do vídeo: {video_path}")
         probe = ffmpeg.probe(video_path)
         duration = float(probe['streams'][0]['duration'])
@@ -86,6 +89,8 @@ def get_video_duration(video_path):
 
 def split_audio_segments(video_path, segment_duration=30):
     """Divide o vídeo em segmentos de áudio temporários"""
+    import ffmpeg
+
     duration = get_video_duration(video_path)
     if not duration:
         log("Não foi possível obter duração, usando arquivo original")
@@ -122,6 +127,8 @@ def split_audio_segments(video_path, segment_duration=30):
     return segments
 
 def transcribe_audio_with_timestamps(video_path, progress_callback=None):
+    import whisper
+
     log("=== INICIANDO TRANSCRIÇÃO DE ÁUDIO ===")
     
     # Garante que os assets do Whisper existam
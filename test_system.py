@@ -9,6 +9,24 @@ import platform
 import subprocess
 import importlib.util
 
+# Pontos de entrada e orçamento (ms) para importá-los: a janela deve abrir em
+# menos de 300 ms, então nada pesado pode ser carregado na importação
+STARTUP_MODULES = ["app", "cli", "daemon"]
+IMPORT_TIME_BUDGET_MS = 300
+
+# Módulos que cli e daemon importam dentro de main() e que a interface importa
+# ao iniciar um job: também não podem carregar as bibliotecas pesadas
+RUNTIME_MODULES = [
+    "view.main_view",
+    "controller.transcribe_controller",
+    "controller.batch_controller",
+    "service.daemon_service",
+    "service.daemon_client_service",
+]
+
+# Bibliotecas que só podem ser carregadas no primeiro uso
+LAZY_MODULES = ["torch", "whisper", "cv2"]
+
 def test_header():
     """Exibe cabeçalho do teste."""
     print("🎬 Video Transcriber - Diagnóstico do Sistema")
@@ -32,19 +50,91 @@ def test_python_packages():
     
     all_ok = True
     
+    # find_spec localiza o pacote sem importá-lo (importar o whisper leva segundos)
     for import_name, package_name in required_packages.items():
         try:
-            if import_name == "tkinter":
-                import tkinter
+            if importlib.util.find_spec(import_name) is None:
+                print(f"❌ {package_name} - não instalado")
+                all_ok = False
             else:
-                __import__(import_name)
-            print(f"✅ {package_name}")
-        except ImportError as e:
+                print(f"✅ {package_name}")
+        except (ImportError, ValueError) as e:
             print(f"❌ {package_name} - ERRO: {e}")
             all_ok = False
     
     return all_ok
 
+def parse_importtime(stderr):
+    """Tempo cumulativo (µs) de cada módulo na saída de `python -X importtime`"""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        timings.setdefault(fields[2].strip(), int(fields[1]))
+    return timings
+
+def loaded_lazy_modules(module, project_dir):
+    """Bibliotecas de LAZY_MODULES presentes em sys.modules após importar `module`"""
+    code = (f"import sys, {module}; "
+            f"print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code],
+                            capture_output=True, text=True, timeout=120, cwd=project_dir)
+    if result.returncode != 0:
+        raise Exception(result.stderr.strip().splitlines()[-1])
+    return [name for name in result.stdout.strip().split(",") if name]
+
+def test_import_time():
+    """Testa se os pontos de entrada importam rápido e sem bibliotecas pesadas."""
+    print("\n⏱️ TESTE DE TEMPO DE IMPORTAÇÃO")
+    print("-" * 30)
+    
+    all_ok = True
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    
+    for module in STARTUP_MODULES:
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                capture_output=True, text=True, timeout=120, cwd=project_dir)
+        if result.returncode != 0:
+            print(f"❌ {module} - ERRO: {result.stderr.strip().splitlines()[-1]}")
+            all_ok = False
+            continue
+        
+        timings = parse_importtime(result.stderr)
+        total_ms = timings.get(module, 0) / 1000
+        eager = [name for name in LAZY_MODULES if name in timings]
+        
+        if eager:
+            print(f"❌ {module}: importa {', '.join(eager)} na inicialização")
+            all_ok = False
+        elif total_ms > IMPORT_TIME_BUDGET_MS:
+            print(f"❌ {module}: {total_ms:.0f} ms (orçamento: {IMPORT_TIME_BUDGET_MS} ms)")
+            all_ok = False
+        else:
+            print(f"✅ {module}: {total_ms:.0f} ms")
+        
+        if eager or total_ms > IMPORT_TIME_BUDGET_MS:
+            slowest = sorted(timings.items(), key=lambda item: -item[1])[1:6]
+            for name, micros in slowest:
+                print(f"   {micros / 1000:8.0f} ms  {name}")
+    
+    for module in RUNTIME_MODULES:
+        try:
+            eager = loaded_lazy_modules(module, project_dir)
+        except Exception as e:
+            print(f"❌ {module} - ERRO: {e}")
+            all_ok = False
+            continue
+        if eager:
+            print(f"❌ {module}: importa {', '.join(eager)} na importação")
+            all_ok = False
+        else:
+            print(f"✅ {module}: sem {', '.join(LAZY_MODULES)}")
+    
+    return all_ok
+
 def test_ffmpeg():
     """Testa se o FFmpeg está funcionando."""
     print("\n🎬 TESTE DO FFMPEG")
@@ -99,6 +189,43 @@ def test_whisper_model():
         print(f"❌ Erro ao carregar modelo: {e}")
         return False
 
+def test_batch_decode_tail():
+    """Testa se o motor em lote detecta o final de janela deixado sem transcrição."""
+    print("\n📦 TESTE DO FINAL DE JANELA (MOTOR EM LOTE)")
+    print("-" * 30)
+    
+    try:
+        from whisper.tokenizer import get_tokenizer
+        from service.batch_decode_service import consumed_until, TIME_PRECISION
+    except Exception as e:
+        print(f"❌ Erro ao importar o motor em lote: {e}")
+        return False
+    
+    tokenizer = get_tokenizer(True, num_languages=99, language="pt", task="transcribe")
+    begin = tokenizer.timestamp_begin
+    
+    def at(seconds):
+        return begin + round(seconds / TIME_PRECISION)
+    
+    text = tokenizer.encode(" olá")
+    cases = [
+        # Par de timestamps no fim: o restante da janela ficou para outra passada
+        ("par de timestamps", [at(0), *text, at(10), at(10)], 10.0),
+        ("timestamp único", [at(0), *text, at(10)], 30.0),
+        ("texto sem timestamp final", [at(0), *text], 30.0),
+    ]
+    
+    all_ok = True
+    for name, tokens, expected in cases:
+        consumed = consumed_until(tokens, begin, 30.0)
+        if abs(consumed - expected) < TIME_PRECISION:
+            print(f"✅ {name}: transcrito até {consumed:.2f}s")
+        else:
+            print(f"❌ {name}: transcrito até {consumed:.2f}s (esperado {expected:.2f}s)")
+            all_ok = False
+    
+    return all_ok
+
 def test_gui():
     """Testa se a interface gráfica pode ser inicializada."""
     print("\n🖥️ TESTE DA INTERFACE GRÁFICA")
@@ -189,6 +316,8 @@ def generate_report(results):
     print("\n💡 PRÓXIMOS PASSOS:")
     if not results.get("packages", False):
         print("   1. Instale os pacotes Python: pip install -r requirements.txt")
+    if not results.get("import_time", False):
+        print("   •  Mova importações pesadas (torch, whisper, cv2) para dentro das funções")
     if not results.get("ffmpeg", False):
         print("   2. Configure o FFmpeg: python setup_ffmpeg.py")
     if not results.get("whisper", False):
@@ -208,8 +337,10 @@ def main():
     # Executa todos os testes
     tests = {
         "packages": test_python_packages,
+        "import_time": test_import_time,
         "ffmpeg": test_ffmpeg,
         "whisper": test_whisper_model,
+        "batch_tail": test_batch_decode_tail,
         "gui": test_gui,
         "permissions": test_file_permissions,
     }
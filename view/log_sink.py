@@ -0,0 +1,90 @@
+"""
+Saída de log da interface, segura para qualquer thread
+
+As mensagens entram em uma fila (queue.SimpleQueue, sem bloqueio para quem
+escreve) e o loop do Tk a esvazia periodicamente com after(), inserindo cada
+lote de uma só vez. O widget mantém no máximo `max_lines` linhas, então o
+custo da interface não cresce com o volume de log.
+"""
+
+import queue
+from datetime import datetime
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+# Mensagens processadas por ciclo do timer (o restante fica para o próximo)
+MAX_BATCH = 1000
+
+def message_level(message):
+    """Nível inferido pelos marcadores usados nas mensagens de log"""
+    text = message.lstrip()
+    if text.startswith(("✗", "❌")) or text.lower().startswith("erro"):
+        return "ERROR"
+    if text.startswith("⚠"):
+        return "WARNING"
+    if text.startswith("Progresso:"):
+        return "DEBUG"
+    return "INFO"
+
+class LogSink:
+    """Fila de mensagens drenada em lotes pelo loop do Tk"""
+
+    def __init__(self, max_lines=2000, level="INFO", interval_ms=100):
+        self.messages = queue.SimpleQueue()
+        self.max_lines = max_lines
+        self.level = LEVELS.get(str(level).upper(), LEVELS["INFO"])
+        self.interval_ms = interval_ms
+        self.widget = None
+        self.lines = 0
+
+    def write(self, message):
+        """Enfileira a mensagem (pode ser chamado de qualquer thread)"""
+        self.messages.put((datetime.now(), message))
+
+    def attach(self, widget):
+        """Liga a fila ao widget de texto e inicia o timer de drenagem"""
+        self.widget = widget
+        self.lines = 0
+        widget.after(self.interval_ms, self._drain)
+
+    def clear(self):
+        if self.widget:
+            self.widget.config(state='normal')
+            self.widget.delete('1.0', 'end')
+            self.widget.config(state='disabled')
+        self.lines = 0
+
+    def _drain(self):
+        widget = self.widget
+        if widget is None:
+            return
+        try:
+            if not widget.winfo_exists():
+                return
+        except Exception:
+            return
+
+        lines = []
+        for _ in range(MAX_BATCH):
+            try:
+                when, message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if LEVELS[message_level(message)] < self.level:
+                continue
+            lines.extend(f"[{when:%H:%M:%S}] {message}".splitlines() or [""])
+
+        if lines:
+            lines = lines[-self.max_lines:]
+            widget.config(state='normal')
+            widget.insert('end', "\n".join(lines) + "\n")
+            self.lines += len(lines)
+            # Anel de linhas: descarta as mais antigas acima do limite
+            excess = self.lines - self.max_lines
+            if excess > 0:
+                widget.delete('1.0', f"{excess + 1}.0")
+                self.lines = self.max_lines
+            widget.see('end')
+            widget.config(state='disabled')
+
+        widget.after(self.interval_ms, self._drain)
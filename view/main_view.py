@@ -1,14 +1,15 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, scrolledtext
-from controller.transcribe_controller import process_video
-from service.whisper_service import play_notification_sound
+from service.daemon_client_service import process_video_auto
+from service.config_service import get_setting
+from view.log_sink import LogSink
 import os
+import queue
 import subprocess
 import platform
 import threading
 import sys
 import gc
-from datetime import datetime
 
 # Constantes para ícones e aparência
 ICON_PATH = "assets/app_icon.ico"
@@ -25,6 +26,16 @@ progress_bar = None
 progress_label = None
 log_text = None
 
+# Fila de log: as threads só enfileiram, o loop do Tk insere em lotes
+log_sink = LogSink(
+    max_lines=get_setting("logging", "gui_max_lines", 2000),
+    level=get_setting("logging", "level", "INFO"),
+    interval_ms=get_setting("logging", "gui_flush_ms", 100),
+)
+
+# Chamadas à interface vindas de outras threads; o loop do Tk as executa
+ui_calls = queue.SimpleQueue()
+
 # Variáveis para controle de processos
 current_thread = None
 is_processing = False
@@ -41,16 +52,26 @@ def open_file(filepath):
     except Exception as e:
         messagebox.showerror("Erro", f"Não foi possível abrir o arquivo:\n{e}")
 
+def run_on_ui(func, *args):
+    """Agenda func(*args) no loop do Tk (seguro em qualquer thread)"""
+    ui_calls.put((func, args))
+
+def drain_ui_calls(window):
+    """Executa as chamadas pendentes e reagenda a si mesma no loop do Tk"""
+    while True:
+        try:
+            func, args = ui_calls.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            func(*args)
+        except Exception as e:
+            log_message(f"✗ Erro ao atualizar a interface: {e}")
+    window.after(log_sink.interval_ms, drain_ui_calls, window)
+
 def log_message(message):
-    """Adiciona uma mensagem ao log com timestamp"""
-    global log_text
-    if log_text:
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        log_text.config(state='normal')
-        log_text.insert('end', f"[{timestamp}] {message}\n")
-        log_text.see('end')
-        log_text.config(state='disabled')
-        log_text.update()
+    """Adiciona uma mensagem ao log com timestamp (seguro em qualquer thread)"""
+    log_sink.write(message)
 
 def setup_window_icon(window):
     """Configura o ícone da janela"""
@@ -65,11 +86,7 @@ def setup_window_icon(window):
 
 def clear_log():
     """Limpa o log"""
-    global log_text
-    if log_text:
-        log_text.config(state='normal')
-        log_text.delete(1.0, 'end')
-        log_text.config(state='disabled')
+    log_sink.clear()
 
 def on_closing(window):
     """Função chamada quando a janela é fechada"""
@@ -97,6 +114,13 @@ def on_closing(window):
             # Mas definimos is_processing=False para sinalizar parada
             is_processing = False
         
+        # Descarrega modelos mantidos em cache entre transcrições
+        try:
+            from service.model_cache_service import unload
+            unload()
+        except Exception:
+            pass
+
         # Força limpeza de memória
         gc.collect()
         
@@ -128,49 +152,75 @@ def select_video():
     if path:
         input_path.set(path)
 
-def update_progress(percentage):
-    """Atualiza a barra de progresso e o label"""
+def set_progress(percentage):
     progress_bar['value'] = percentage
     progress_label.config(text=f"Processando... {percentage}%")
-    progress_bar.update()
 
-def transcribe_video_thread():
-    """Função que roda a transcrição em thread separada"""
-    global transcription_txt, output_dir, button_frame
+def update_progress(percentage):
+    """Atualiza a barra de progresso e o label (seguro em qualquer thread)"""
+    run_on_ui(set_progress, percentage)
+
+def show_progress():
+    progress_bar.pack(pady=5)
+    progress_label.pack(pady=2)
+
+def hide_progress():
+    progress_bar.pack_forget()
+    progress_label.pack_forget()
+
+def show_results(blog_txt, hotmart_txt, youtube_txt, frames_dir):
+    """Exibe os botões dos arquivos gerados (executada no loop do Tk)"""
+    hide_progress()
+    status_label.config(text="Transcrição concluída com sucesso!")
+
+    # Remove botões anteriores (se houver)
+    for widget in button_frame.winfo_children():
+        widget.destroy()
+
+    # Adiciona novos botões para abrir arquivos
+    tk.Label(button_frame, text="Abrir arquivos gerados:", font=("Arial", 10, "bold")).pack(pady=(10, 5))
+
+    tk.Button(button_frame, text="📝 Artigo para Blog", command=lambda: open_file(blog_txt)).pack(pady=2)
+    tk.Button(button_frame, text="🎓 Apresentação Hotmart", command=lambda: open_file(hotmart_txt)).pack(pady=2)
+    tk.Button(button_frame, text="📺 Descrição para YouTube", command=lambda: open_file(youtube_txt)).pack(pady=2)
+    if frames_dir:
+        tk.Button(button_frame, text="🖼 Quadros do vídeo", command=lambda: open_file(frames_dir)).pack(pady=2)
+
+    # Reabilita botão de transcrever
+    transcribe_btn.config(state="normal")
+
+def show_error(message):
+    """Exibe o erro da transcrição (executada no loop do Tk)"""
+    hide_progress()
+    status_label.config(text="Erro na transcrição.")
+    messagebox.showerror("Erro", message)
+    transcribe_btn.config(state="normal")
+
+def transcribe_video_thread(video_path):
+    """Função que roda a transcrição em thread separada
+
+    Esta thread não toca nos widgets: toda atualização da interface passa
+    por run_on_ui (e o log por log_sink).
+    """
+    global transcription_txt, output_dir
 
-    video_path = input_path.get()
-    
     try:
         log_message("=== INICIANDO TRANSCRIÇÃO ===")
         log_message(f"Arquivo de vídeo: {video_path}")
         
         # Mostra barra de progresso
-        progress_bar.pack(pady=5)
-        progress_label.pack(pady=2)
+        run_on_ui(show_progress)
         
         log_message("Verificando dependências...")
         
-        # Teste de importação das principais bibliotrias
+        # Ferramentas e hardware detectados uma vez e persistidos (ver toolchain_service)
         try:
-            import torch
-            log_message(f"✓ PyTorch carregado: {torch.__version__}")
-            log_message(f"✓ CUDA disponível: {torch.cuda.is_available()}")
-            if torch.cuda.is_available():
-                log_message(f"✓ GPU: {torch.cuda.get_device_name(0)}")
+            from service.log_service import set_log_callback
+            from service.toolchain_service import log_toolchain
+            set_log_callback(log_message)
+            log_toolchain()
         except Exception as e:
-            log_message(f"✗ Erro ao carregar PyTorch: {e}")
-            
-        try:
-            import whisper
-            log_message("✓ Whisper carregado")
-        except Exception as e:
-            log_message(f"✗ Erro ao carregar Whisper: {e}")
-            
-        try:
-            import ffmpeg
-            log_message("✓ FFmpeg carregado")
-        except Exception as e:
-            log_message(f"✗ Erro ao carregar FFmpeg: {e}")
+            log_message(f"✗ Erro ao verificar dependências: {e}")
         
         log_message("Iniciando processamento do vídeo...")
         
@@ -178,57 +228,34 @@ def transcribe_video_thread():
             update_progress(percentage)
             log_message(f"Progresso: {percentage}%")
         
-        _, blog_txt, hotmart_txt, youtube_txt, output_dir = process_video(video_path, progress_callback, log_message)
+        _, blog_txt, hotmart_txt, youtube_txt, output_dir, frames_dir = process_video_auto(video_path, progress_callback, log_message)
         transcription_txt = blog_txt
-
-        # Esconde barra de progresso
-        progress_bar.pack_forget()
-        progress_label.pack_forget()
         
         log_message("=== TRANSCRIÇÃO CONCLUÍDA ===")
         log_message(f"Arquivos gerados em: {output_dir}")
         log_message(f"- Blog: {blog_txt}")
         log_message(f"- Hotmart: {hotmart_txt}")
         log_message(f"- YouTube: {youtube_txt}")
+        if frames_dir:
+            log_message(f"- Quadros: {frames_dir}")
         
-        status_label.config(text="Transcrição concluída com sucesso!")
-
-        # Remove botões anteriores (se houver)
-        for widget in button_frame.winfo_children():
-            widget.destroy()
-
-        # Adiciona novos botões para abrir arquivos
-        tk.Label(button_frame, text="Abrir arquivos gerados:", font=("Arial", 10, "bold")).pack(pady=(10, 5))
-
-        tk.Button(button_frame, text="📝 Artigo para Blog", command=lambda: open_file(blog_txt)).pack(pady=2)
-        tk.Button(button_frame, text="🎓 Apresentação Hotmart", command=lambda: open_file(hotmart_txt)).pack(pady=2)
-        tk.Button(button_frame, text="📺 Descrição para YouTube", command=lambda: open_file(youtube_txt)).pack(pady=2)
-
-        # Reabilita botão de transcrever
-        transcribe_btn.config(state="normal")
+        # Esconde a barra de progresso e mostra os arquivos gerados
+        run_on_ui(show_results, blog_txt, hotmart_txt, youtube_txt, frames_dir)
 
     except Exception as e:
-        # Esconde barra de progresso em caso de erro
-        progress_bar.pack_forget()
-        progress_label.pack_forget()
-        
         log_message(f"✗ ERRO NA TRANSCRIÇÃO: {str(e)}")
         log_message(f"Tipo do erro: {type(e).__name__}")
         
         # Log do stack trace completo
         import traceback
         stack_trace = traceback.format_exc()
-        log_message("Stack trace completo:")
-        for line in stack_trace.split('\n'):
-            if line.strip():
-                log_message(f"  {line}")
+        log_message("Stack trace completo:\n" + stack_trace.rstrip())
         
         # Toca som de erro
+        from service.whisper_service import play_notification_sound
         play_notification_sound("alert")
         
-        status_label.config(text="Erro na transcrição.")
-        messagebox.showerror("Erro", str(e))
-        transcribe_btn.config(state="normal")
+        run_on_ui(show_error, str(e))
 
 def transcribe_video():
     global transcription_txt, output_dir, button_frame
@@ -270,7 +297,7 @@ def transcribe_video():
         transcribe_btn.config(state="disabled")
         
         # Inicia transcrição em thread separada
-        thread = threading.Thread(target=transcribe_video_thread)
+        thread = threading.Thread(target=transcribe_video_thread, args=(video_path,))
         thread.daemon = True
         thread.start()
 
@@ -355,6 +382,8 @@ def start_app():
         fg="lightgreen"
     )
     log_text.pack(fill='both', expand=True, pady=5)
+    log_sink.attach(log_text)
+    window.after(log_sink.interval_ms, drain_ui_calls, window)
 
     # Botão para limpar log
     # Botão para limpar log
@@ -5,10 +5,15 @@ Splash Screen com logs de inicialização
 import tkinter as tk
 from tkinter import ttk
 import threading
+import queue
 import time
 from datetime import datetime
 import sys
 import os
+from service.log_service import set_log_callback
+
+# Intervalo (ms) em que o loop do Tk aplica os logs da thread de carregamento
+POLL_INTERVAL_MS = 50
 
 class SplashScreen:
     def __init__(self, on_complete_callback=None, real_loading=False):
@@ -18,11 +23,16 @@ class SplashScreen:
         self.log_text = None
         self.progress_bar = None
         self.loading_complete = False
+        # Logs e status da thread de carregamento, aplicados pelo loop do Tk
+        self.events = queue.SimpleQueue()
         self.setup_splash()
         
     def setup_splash(self):
         """Configura a janela de splash"""
-        self.splash = tk.Toplevel()
+        # Raiz própria e oculta: a janela principal cria a sua depois que o splash fecha
+        self.root = tk.Tk()
+        self.root.withdraw()
+        self.splash = tk.Toplevel(self.root)
         self.splash.title("Video Transcriber - Carregando...")
         self.splash.geometry("600x450")
         self.splash.resizable(False, False)
@@ -151,112 +161,113 @@ class SplashScreen:
         self.splash.attributes('-topmost', True)
         
     def log(self, message, color='#00ff00'):
-        """Adiciona mensagem ao log do splash"""
-        if self.log_text and not self.loading_complete:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            log_entry = f"[{timestamp}] {message}\n"
+        """Adiciona mensagem ao log do splash (pode ser chamado de qualquer thread)"""
+        if not self.loading_complete:
+            self.events.put(("log", f"[{datetime.now():%H:%M:%S}] {message}\n"))
             
+    def update_status(self, status):
+        """Atualiza o status na barra de progresso (pode ser chamado de qualquer thread)"""
+        if not self.loading_complete:
+            self.events.put(("status", status))
+
+    def finish(self):
+        """Sinaliza ao loop do Tk que o carregamento terminou"""
+        self.events.put(("done", None))
+
+    def _poll_events(self):
+        """Aplica logs e status enfileirados pela thread de carregamento (thread do Tk)"""
+        done = False
+        lines = []
+        while True:
+            try:
+                kind, value = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "log":
+                lines.append(value)
+            elif kind == "status":
+                self.status_label.config(text=value)
+            elif kind == "done":
+                done = True
+
+        if lines:
             self.log_text.config(state='normal')
-            self.log_text.insert('end', log_entry)
+            self.log_text.insert('end', "".join(lines))
             self.log_text.see('end')
             self.log_text.config(state='disabled')
-            
-            # Força atualização da interface
-            self.splash.update()
-            
-    def update_status(self, status):
-        """Atualiza o status na barra de progresso"""
-        if self.status_label and not self.loading_complete:
-            self.status_label.config(text=status)
-            self.splash.update()
+
+        if done:
+            self.close()
+        else:
+            self.splash.after(POLL_INTERVAL_MS, self._poll_events)
             
     def real_loading_process(self):
-        """Processo de carregamento real da aplicação"""
+        """Aquece a aplicação: bibliotecas, FFmpeg e o modelo configurado
+
+        O modelo fica no cache de modelos do processo, então a primeira
+        transcrição da janela principal já o encontra carregado e aquecido.
+        """
+        started = time.perf_counter()
         try:
             self.log("🚀 Iniciando Video Transcriber...")
-            self.update_status("Verificando ambiente...")
-            time.sleep(0.3)
-            
-            self.log("🐍 Verificando Python environment...")
-            import sys
-            self.log(f"   Python {sys.version.split()[0]}")
-            time.sleep(0.2)
+            self.log(f"🐍 Python {sys.version.split()[0]}")
             
-            self.log("📦 Carregando bibliotecas principais...")
-            self.update_status("Carregando Tkinter...")
-            import tkinter
-            self.log("   ✅ Tkinter")
-            time.sleep(0.1)
-            
-            self.update_status("Carregando threading...")
-            import threading
-            self.log("   ✅ Threading")
-            time.sleep(0.1)
-            
-            self.update_status("Verificando FFmpeg...")
-            self.log("🎥 Verificando FFmpeg...")
+            self.update_status("Carregando PyTorch...")
+            self.log("📦 Carregando PyTorch...")
             try:
-                import subprocess
-                result = subprocess.run(['ffmpeg', '-version'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    version_line = result.stdout.split('\n')[0]
-                    self.log(f"   ✅ {version_line}")
+                import torch
+                self.log(f"   ✅ PyTorch {torch.__version__}")
+                if torch.cuda.is_available():
+                    gpu_name = torch.cuda.get_device_name(0)
+                    self.log(f"   ✅ GPU detectada: {gpu_name}")
+                    self.log(f"   📊 VRAM disponível: {torch.cuda.get_device_properties(0).total_memory // 1024**3}GB")
                 else:
-                    self.log("   ⚠️ FFmpeg não encontrado")
-            except:
-                self.log("   ⚠️ FFmpeg não disponível")
-            time.sleep(0.4)
+                    self.log("   ⚠️ CUDA não disponível - usando CPU")
+            except Exception as e:
+                self.log(f"   ❌ Erro ao importar PyTorch: {e}")
             
             self.update_status("Carregando OpenAI Whisper...")
             self.log("🤖 Carregando OpenAI Whisper...")
             try:
-                import whisper
+                from service import whisper_service
                 self.log("   ✅ Whisper importado com sucesso")
-                time.sleep(0.5)
-                
-                # Verificar modelos disponíveis
-                self.log("   📋 Modelos disponíveis:")
-                for model in ["tiny", "base", "small", "medium", "large"]:
-                    self.log(f"      • {model}")
-                time.sleep(0.3)
-                    
             except Exception as e:
                 self.log(f"   ❌ Erro ao importar Whisper: {e}")
-                time.sleep(0.2)
+                return
             
-            self.update_status("Verificando CUDA...")
-            self.log("🚀 Verificando CUDA...")
-            try:
-                import torch
-                if torch.cuda.is_available():
-                    gpu_name = torch.cuda.get_device_name(0)
-                    self.log(f"   ✅ GPU detectada: {gpu_name}")
-                    self.log(f"   📊 VRAM disponível: {torch.cuda.get_device_properties(0).total_memory // 1024**3}GB")
-                else:
-                    self.log("   ⚠️ CUDA não disponível - usando CPU")
-            except:
-                self.log("   ⚠️ PyTorch não encontrado")
-            time.sleep(0.4)
+            self.update_status("Verificando FFmpeg...")
+            self.log("🎥 Verificando FFmpeg...")
+            if whisper_service.configure_ffmpeg():
+                self.log(f"   ✅ {whisper_service.check_ffmpeg_availability()[1]}")
+            else:
+                self.log("   ⚠️ FFmpeg não disponível")
             
-            self.update_status("Configurando interface...")
-            self.log("🖼️ Configurando interface gráfica...")
-            self.log("   ✅ Preparando controladores")
-            self.log("   ✅ Carregando serviços")
-            self.log("   ✅ Configurando callbacks")
-            time.sleep(0.3)
+            from service.daemon_client_service import daemon_available
+            if daemon_available():
+                self.log("🛰 Daemon de transcrição ativo - modelo já carregado por ele")
+            else:
+                model_size = whisper_service.get_setting("whisper", "model_size", "small")
+                self.update_status(f"Carregando modelo {model_size}...")
+                self.log(f"🧠 Carregando e aquecendo o modelo {model_size}...")
+                model_started = time.perf_counter()
+                set_log_callback(lambda message: self.log(f"   {message}"))
+                try:
+                    whisper_service.preload_model(warm_up=True)
+                    self.log(f"   ✅ Modelo pronto em {time.perf_counter() - model_started:.1f}s")
+                except Exception as e:
+                    # A transcrição tenta carregar o modelo de novo quando for usada
+                    self.log(f"   ⚠️ Não foi possível pré-carregar o modelo: {e}")
+                finally:
+                    set_log_callback(None)
             
-            self.log("✨ Inicialização concluída!")
+            self.log(f"✨ Inicialização concluída em {time.perf_counter() - started:.1f}s!")
             self.update_status("Pronto!")
-            time.sleep(0.5)
             
         except Exception as e:
             self.log(f"❌ Erro durante inicialização: {e}")
-            time.sleep(1)
             
         finally:
-            self.loading_complete = True
-            self.close()
+            self.finish()
             
     def simulate_loading(self):
         """Simula processo de carregamento com logs"""
@@ -285,9 +296,8 @@ class SplashScreen:
         self.log("✅ Aplicação pronta para uso!", '#00ff00')
         time.sleep(0.5)
         
-        # Fecha splash e chama callback
-        self.loading_complete = True
-        self.splash.after(100, self.close)
+        # Fecha splash (o callback roda na thread do Tk, em show)
+        self.finish()
         
     def start_loading(self):
         """Inicia carregamento em thread separada"""
@@ -299,18 +309,22 @@ class SplashScreen:
         loading_thread.start()
         
     def close(self):
-        """Fecha o splash screen"""
-        if self.splash:
-            self.splash.destroy()
-            
-        # Chama callback se definido
-        if self.on_complete_callback:
-            self.on_complete_callback()
+        """Fecha o splash screen e encerra o seu loop do Tk"""
+        self.loading_complete = True
+        if self.root:
+            self.root.destroy()
+            self.root = None
+            self.splash = None
             
     def show(self):
-        """Mostra o splash screen"""
+        """Mostra o splash screen e chama o callback ao terminar o carregamento"""
         self.start_loading()
-        self.splash.mainloop()
+        self.splash.after(POLL_INTERVAL_MS, self._poll_events)
+        self.root.mainloop()
+
+        # Chama callback se definido (na thread principal, após o splash fechar)
+        if self.loading_complete and self.on_complete_callback:
+            self.on_complete_callback()
 
 def test_splash():
     """Teste do splash screen"""